@@ -4,45 +4,307 @@ Downloads documents before editing, uploads after saving.
 """
 
 import os
+import re
+import time
+import logging
+import shutil
+import hashlib
 import tempfile
-from typing import Optional
+import threading
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import BinaryIO, Dict, Optional, Set, Tuple
 from storage_adapter import get_storage_adapter
 
+try:
+    from botocore.exceptions import ClientError, ConnectionError as BotoConnectionError, HTTPClientError
+    RETRYABLE_ERRORS: Tuple[type, ...] = (ConnectionError, TimeoutError, BotoConnectionError, HTTPClientError)
+except ImportError:
+    ClientError = None
+    RETRYABLE_ERRORS = (ConnectionError, TimeoutError)
+
+# S3 error codes worth another attempt; any other client error (AccessDenied,
+# NoSuchBucket, InvalidAccessKeyId, ...) fails the same way every time
+RETRYABLE_CLIENT_CODES = frozenset({
+    'RequestTimeout', 'RequestTimeoutException', 'SlowDown', 'Throttling',
+    'ThrottlingException', 'RequestLimitExceeded', 'TooManyRequestsException',
+    'InternalError', 'ServiceUnavailable',
+})
+
+# Child of the server's "mcp" logger, so records go through its handlers
+logger = logging.getLogger("mcp.documents")
+
+# Number of background threads used to upload documents to storage
+UPLOAD_WORKERS = int(os.getenv('UPLOAD_WORKERS', '4'))
+# Number of attempts made for each storage transfer before giving up
+TRANSFER_RETRIES = 3
+# Seconds a storage existence check is trusted before asking storage again
+EXISTS_CACHE_TTL = 5.0
+# Most filenames kept in the existence cache
+EXISTS_CACHE_MAX = 4096
+# Quiet period before an edited document is uploaded; edits to the same
+# document within this window are coalesced into a single upload (0 disables)
+UPLOAD_DEBOUNCE_MS = int(os.getenv('UPLOAD_DEBOUNCE_MS', '500'))
+# Seconds before a failed upload of released edits is attempted again
+UPLOAD_RETRY_DELAY = float(os.getenv('UPLOAD_RETRY_DELAY', '30'))
+# Tools that write a brand-new document over the target, so the current
+# stored copy never needs to be downloaded first
+OVERWRITING_TOOLS = frozenset({'create_document'})
+# Documents up to this size are streamed through memory, larger ones spill to disk
+STREAM_SPOOL_MAX = 8 << 20
+# Unmodified documents kept on local disk for reuse, least recently used first out
+LOCAL_CACHE_MAX_FILES = int(os.getenv('LOCAL_CACHE_MAX_FILES', '128'))
+LOCAL_CACHE_MAX_BYTES = int(os.getenv('LOCAL_CACHE_MAX_MB', '512')) << 20
+# Seconds a cached local copy is trusted without asking storage for its ETag
+LOCAL_CACHE_TTL = 5.0
+# Temp file names keep at most this much of the document name, and only these characters
+LEAF_STEM_MAX = 64
+_UNSAFE_NAME_CHARS = re.compile(r'[^\w.-]')
+
+def _is_transient(error: BaseException) -> bool:
+    """Whether a storage failure may succeed on retry."""
+    if isinstance(error, RETRYABLE_ERRORS):
+        return True
+    if ClientError is not None and isinstance(error, ClientError):
+        response = error.response
+        status = response.get('ResponseMetadata', {}).get('HTTPStatusCode') or 0
+        return response.get('Error', {}).get('Code') in RETRYABLE_CLIENT_CODES or status >= 500
+    return False
+
+
+# Process-wide temp directory shared by every DocumentManager
+_temp_root: Optional[str] = None
+
+
+def _get_temp_root() -> str:
+    """Get or create the process-wide temp directory for editing documents."""
+    global _temp_root
+    if _temp_root is None:
+        _temp_root = tempfile.mkdtemp(prefix='doc_edit_')
+    return _temp_root
+
 
 class DocumentManager:
     """Manages document lifecycle with automatic storage sync."""
     
     def __init__(self):
         self.storage = get_storage_adapter()
-        self.temp_dir = tempfile.mkdtemp(prefix='doc_edit_')
+        self.temp_dir = _get_temp_root()
+        # False once cleanup_temp() removed the directory; recreated lazily
+        self._dir_alive = True
+        # True once a temp file may have been written since the last full cleanup
+        self._created_any = False
+        # Temp files handed out by get_local_path() and not yet cleaned up
+        self._live: Set[str] = set()
+        self._pool = ThreadPoolExecutor(max_workers=UPLOAD_WORKERS, thread_name_prefix='doc_upload')
+        self._pending: Dict[str, Future] = {}
+        # Debounced uploads waiting for their quiet period, keyed by filename
+        self._timers: Dict[str, threading.Timer] = {}
+        # Temp files holding edits that have not been uploaded yet
+        self._dirty: Set[str] = set()
+        self._lock = threading.Lock()
+        # Per-document locks for callers that edit from several threads. Names
+        # come from requests, so an entry only lives while someone holds its lock
+        self._doc_locks: "weakref.WeakValueDictionary[str, threading.Lock]" = weakref.WeakValueDictionary()
+        # (mtime_ns, size) of each temp file as it was downloaded
+        self._sig: Dict[str, Tuple[int, int]] = {}
+        # filename -> (timestamp, exists) memo of storage lookups
+        self._exists_cache: Dict[str, Tuple[float, bool]] = {}
+        # temp path -> storage ETag of the content it was downloaded from
+        self._etag: Dict[str, str] = {}
+        # Cached temp files not in use: temp path -> (filename, size, cached at)
+        self._lru: "OrderedDict[str, Tuple[str, int, float]]" = OrderedDict()
+        self._lru_bytes = 0
+    
+    def document_lock(self, filename: str) -> threading.Lock:
+        """Get the lock that serializes edits of one document across threads."""
+        key = os.path.basename(filename)
+        with self._lock:
+            lock = self._doc_locks.get(key)
+            if lock is None:
+                lock = self._doc_locks[key] = threading.Lock()
+        return lock
+    
+    def _leaf(self, filename: str) -> str:
+        """
+        Get the temp path used for a document.
+        
+        The name is the document's basename with unusual characters replaced,
+        plus a short hash of the original basename, so every document maps to
+        a distinct flat file directly inside temp_dir that tools still report
+        under a recognizable name.
+        """
+        # Not memoized: names come from requests, and hashing one is cheap
+        base = os.path.basename(filename)
+        stem, ext = os.path.splitext(base)
+        digest = hashlib.blake2b(base.encode('utf-8'), digest_size=4).hexdigest()
+        stem = _UNSAFE_NAME_CHARS.sub('_', stem)[:LEAF_STEM_MAX]
+        return os.path.join(self.temp_dir, f"{stem}-{digest}{_UNSAFE_NAME_CHARS.sub('_', ext)}")
     
-    def get_local_path(self, filename: str, create_if_missing: bool = False) -> str:
+    @staticmethod
+    def display_text(text: str, local_path: str, filename: str) -> str:
+        """
+        Replace a temp path in a tool's message with the document's name.
+        
+        Paths derived from it (e.g. the "_copy" written next to it) are
+        renamed the same way.
+        """
+        return text.replace(os.path.splitext(local_path)[0], os.path.splitext(os.path.basename(filename))[0])
+    
+    def get_local_path(self, filename: str, create_if_missing: bool = False, download: bool = True) -> str:
         """
         Get local file path for editing.
         Downloads from storage if needed.
         
         Args:
-            filename: Document filename
+            filename: Document filename; only its basename is used for the
+                temp file, which always lives directly inside temp_dir
             create_if_missing: If True, create empty file if it doesn't exist
+            download: If False, skip downloading an existing document because
+                the caller is about to overwrite it completely
         
         Returns:
             Local file path for editing
         """
-        # Check if document exists in storage
-        if self.storage.document_exists(filename):
+        # Make sure a previous upload of this document has landed first. If it
+        # failed, its edits are still in the temp file and a retry is scheduled
+        try:
+            self.wait_for_upload(filename)
+        except Exception as e:
+            logger.warning("Upload of %s failed, editing the local copy: %s", filename, e)
+        
+        # A scheduled upload means the temp file is newer than storage:
+        # keep editing it and let the next release reschedule the upload
+        with self._lock:
+            timer = self._timers.pop(os.path.basename(filename), None)
+        if timer is not None:
+            timer.cancel()
+            return self._leaf(filename)
+        
+        if not self._dir_alive:
+            os.makedirs(self.temp_dir, exist_ok=True)
+            self._dir_alive = True
+        
+        if not download:
+            # The stored copy is about to be replaced, don't fetch it
+            local_path = self._leaf(filename)
+            self._created_any = True
+            self._live.add(local_path)
+            return local_path
+        
+        # A local copy that still matches storage can be used as is
+        local_path = self._leaf(filename)
+        cached_at = self._uncache_local(local_path)
+        etag = self._etag.get(local_path)
+        if etag is not None and local_path in self._live:
+            if cached_at is not None and time.monotonic() - cached_at < LOCAL_CACHE_TTL:
+                current = etag
+            else:
+                current = self._call_with_retry(self.storage.get_document_etag, filename)
+            signature = self._stat_signature(local_path)
+            if current == etag and signature == self._sig.get(local_path):
+                return local_path
+        
+        # Check if document exists in storage. The etag lookup is the check
+        # itself, unless the name is already known to be missing
+        etag = None
+        cached = self._exists_cache.get(filename)
+        if cached is None or time.monotonic() - cached[0] >= EXISTS_CACHE_TTL or cached[1]:
+            # Tag first: if storage changes mid-download the tags won't match next time
+            etag = self._call_with_retry(self.storage.get_document_etag, filename)
+            self._remember_exists(filename, etag is not None)
+        if etag is not None:
             # Download to temp location for editing
-            local_path = os.path.join(self.temp_dir, filename)
-            self.storage.download_document(filename, local_path)
+            self._created_any = True
+            self._live.add(local_path)
+            self._call_with_retry(self.storage.download_document, filename, local_path)
+            self._sig[local_path] = self._stat_signature(local_path)
+            self._etag[local_path] = etag
             return local_path
         elif create_if_missing:
-            # Create new document in temp location
-            local_path = os.path.join(self.temp_dir, filename)
-            # Ensure directory exists
-            os.makedirs(os.path.dirname(local_path), exist_ok=True)
+            # Create new document in temp location (temp_dir was ensured above)
+            self._created_any = True
+            self._live.add(local_path)
             return local_path
         else:
             raise FileNotFoundError(f"Document {filename} not found")
     
+    def open_document(self, filename: str) -> BinaryIO:
+        """
+        Open a document for reading without creating a temp file for it.
+        
+        Documents on disk are opened in place; small S3 documents are streamed
+        into memory. If the newest edits of the document have not been
+        uploaded yet, the local copy is opened instead.
+        
+        Args:
+            filename: Document filename
+        
+        Returns:
+            Readable binary file object positioned at the start
+        """
+        local_path = self._leaf(filename)
+        if local_path in self._dirty:
+            try:
+                return open(local_path, 'rb')
+            except FileNotFoundError:
+                pass
+        
+        try:
+            self.wait_for_upload(filename)
+        except Exception:
+            # The upload failed and left the newest edits in the temp file
+            return open(local_path, 'rb')
+        if self.storage.storage_type != 's3':
+            # Already on this machine; hand out the stored file itself
+            return os.fdopen(self.storage.open_read_fd(filename), 'rb')
+        
+        spool = tempfile.SpooledTemporaryFile(max_size=STREAM_SPOOL_MAX)
+        try:
+            return self.storage.download_stream(filename, spool)
+        except Exception:
+            spool.close()
+            raise
+    
+    def document_exists(self, filename: str) -> bool:
+        """Check if a document exists in storage, memoized for a few seconds."""
+        now = time.monotonic()
+        cached = self._exists_cache.get(filename)
+        if cached is not None and now - cached[0] < EXISTS_CACHE_TTL:
+            return cached[1]
+        exists = self.storage.document_exists(filename)
+        self._remember_exists(filename, exists)
+        return exists
+    
+    def _remember_exists(self, filename: str, exists: bool) -> None:
+        if len(self._exists_cache) >= EXISTS_CACHE_MAX:
+            # Mostly one-off lookups of missing names; start over rather than track age
+            self._exists_cache.clear()
+        self._exists_cache[filename] = (time.monotonic(), exists)
+    
+    def is_modified(self, local_path: str) -> bool:
+        """
+        Check whether a temp file changed since it was downloaded.
+        
+        Files that were created locally (never downloaded) count as modified
+        as soon as they exist.
+        """
+        signature = self._stat_signature(local_path)
+        if signature is None:
+            return False
+        return self._sig.get(local_path) != signature
+    
+    @staticmethod
+    def _stat_signature(local_path: str) -> Optional[Tuple[int, int]]:
+        """Return (mtime_ns, size) for a file, or None if it does not exist."""
+        try:
+            st = os.stat(local_path)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+    
     def save_document(self, local_path: str, filename: str) -> str:
         """
         Save document to storage and return URL.
@@ -54,25 +316,251 @@ class DocumentManager:
         Returns:
             Document URL
         """
-        # Upload to storage
-        url = self.storage.upload_document(local_path, filename)
+        return self.submit_upload(local_path, filename).result()
+    
+    def submit_upload(self, local_path: str, filename: str, release: bool = False) -> Future:
+        """
+        Upload a document to storage in the background.
+        
+        Args:
+            local_path: Local file path
+            filename: Target filename in storage
+            release: If True, the temp file is handed to the local cache once
+                the upload has finished; if the upload failed, it stays the
+                current copy of the document and is uploaded again later
+        
+        Returns:
+            Future resolving to the document URL
+        """
+        future = self._pool.submit(self._upload_with_retry, local_path, filename, release)
+        self._pending[os.path.basename(filename)] = future
+        return future
+    
+    def schedule_upload(self, local_path: str, filename: str) -> None:
+        """
+        Upload a document once no further edits arrive for UPLOAD_DEBOUNCE_MS.
+        
+        The temp file stays in place until the upload runs, and then moves to
+        the local cache.
+        
+        Args:
+            local_path: Local file path
+            filename: Target filename in storage
+        """
+        with self._lock:
+            if UPLOAD_DEBOUNCE_MS <= 0:
+                previous = self._timers.pop(os.path.basename(filename), None)
+                if previous is not None:
+                    previous.cancel()
+                self._dirty.discard(local_path)
+                self.submit_upload(local_path, filename, release=True)
+                return
+            self._dirty.add(local_path)
+            self._start_timer(local_path, filename, UPLOAD_DEBOUNCE_MS / 1000)
+    
+    def _start_timer(self, local_path: str, filename: str, delay: float) -> None:
+        """(Re)start the timer that uploads a dirty document; called with _lock held."""
+        key = os.path.basename(filename)
+        previous = self._timers.pop(key, None)
+        if previous is not None:
+            previous.cancel()
+        timer = threading.Timer(delay, self._flush_upload, (local_path, filename))
+        # Pending edits are written out by flush_uploads(); a timer alone must
+        # not keep the interpreter from exiting
+        timer.daemon = True
+        self._timers[key] = timer
+        timer.start()
+    
+    def release_local_path(self, local_path: str, filename: str, modified: bool) -> None:
+        """
+        Hand back a temp file once a tool is done with it.
+        
+        Modified files, and files still holding earlier edits, are scheduled
+        for upload; copies known to match storage go to the local cache and
+        anything else is cleaned up right away.
+        """
+        if modified or local_path in self._dirty:
+            self.schedule_upload(local_path, filename)
+        elif local_path in self._etag:
+            self._cache_local(local_path, filename)
+        else:
+            self.cleanup_temp(os.path.basename(filename))
+    
+    def _cache_local(self, local_path: str, filename: str) -> None:
+        """Keep an unmodified temp file for reuse, evicting the oldest over quota."""
+        signature = self._sig.get(local_path)
+        if signature is None:
+            self.cleanup_temp(os.path.basename(filename))
+            return
+        evicted = []
+        with self._lock:
+            self._lru_bytes -= self._lru.pop(local_path, (None, 0, 0.0))[1]
+            self._lru[local_path] = (filename, signature[1], time.monotonic())
+            self._lru_bytes += signature[1]
+            while self._lru and (len(self._lru) > LOCAL_CACHE_MAX_FILES or self._lru_bytes > LOCAL_CACHE_MAX_BYTES):
+                _, (old_filename, size, _) = self._lru.popitem(last=False)
+                self._lru_bytes -= size
+                evicted.append(old_filename)
+        for old_filename in evicted:
+            self.cleanup_temp(os.path.basename(old_filename))
+    
+    def _uncache_local(self, local_path: str) -> Optional[float]:
+        """Take a temp file out of the local cache; return when it was cached."""
+        with self._lock:
+            entry = self._lru.pop(local_path, None)
+            if entry is None:
+                return None
+            self._lru_bytes -= entry[1]
+            return entry[2]
+    
+    def _flush_upload(self, local_path: str, filename: str) -> None:
+        """Timer callback: start the debounced upload unless it was superseded."""
+        key = os.path.basename(filename)
+        with self._lock:
+            if self._timers.get(key) is not threading.current_thread():
+                return
+            del self._timers[key]
+            self._dirty.discard(local_path)
+            try:
+                self.submit_upload(local_path, filename, release=True)
+                return
+            except RuntimeError:
+                # The executor is gone at interpreter shutdown
+                pass
+        # Upload inline, outside the lock the upload's release step needs
+        try:
+            self._upload_with_retry(local_path, filename, release=True)
+        except Exception as e:
+            logger.warning("Upload of %s failed: %s", filename, e)
+    
+    def flush_uploads(self) -> None:
+        """
+        Start every debounced upload now and wait until all uploads finished.
+        
+        Raises the first upload error after waiting for the rest; documents
+        whose upload failed keep their edits and are retried later.
+        """
+        with self._lock:
+            timers = list(self._timers.values())
+            self._timers.clear()
+            for timer in timers:
+                timer.cancel()
+                local_path, filename = timer.args
+                self._dirty.discard(local_path)
+                self.submit_upload(local_path, filename, release=True)
+        errors = []
+        for key in list(self._pending):
+            try:
+                self.wait_for_upload(key)
+            except Exception as e:
+                errors.append(e)
+        if errors:
+            raise errors[0]
+    
+    def wait_for_upload(self, filename: str) -> Optional[str]:
+        """
+        Block until a pending upload of filename finishes; return its URL.
+        
+        Raises the upload's error if it failed.
+        """
+        future = self._pending.pop(os.path.basename(filename), None)
+        if future is None:
+            return None
+        return future.result()
+    
+    def _upload_with_retry(self, local_path: str, filename: str, release: bool = False) -> str:
+        """Upload a document, retrying transient storage failures."""
+        # Releasing happens before the future resolves, so a later download
+        # of the same document cannot race with it
+        try:
+            signature = self._stat_signature(local_path)
+            url, etag = self._call_with_retry(self.storage.upload_document_with_etag, local_path, filename)
+            self._exists_cache[filename] = (time.monotonic(), True)
+        except Exception:
+            if release:
+                # The temp file holds the only copy of the edits: keep it as the
+                # current version of the document and try again later
+                with self._lock:
+                    self._dirty.add(local_path)
+                    self._start_timer(local_path, filename, UPLOAD_RETRY_DELAY)
+            raise
+        if release:
+            # Without an ETag from the upload (large multipart S3 uploads) the
+            # copy can't be revalidated later, so it isn't kept
+            if etag is not None and signature is not None:
+                # The temp file now matches storage and can be reused as is
+                self._sig[local_path] = signature
+                self._etag[local_path] = etag
+                self._cache_local(local_path, filename)
+            else:
+                self.cleanup_temp(os.path.basename(filename))
         return url
     
+    @staticmethod
+    def _call_with_retry(fn, *args, **kwargs):
+        """
+        Call a storage operation, retrying transient failures with exponential backoff.
+        
+        Network and timeout errors, and S3 throttling and 5xx responses, are
+        retried up to TRANSFER_RETRIES times; anything else (e.g. AccessDenied
+        or FileNotFoundError) is raised immediately.
+        """
+        for attempt in range(TRANSFER_RETRIES):
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                transient = _is_transient(e) or (e.__cause__ is not None and _is_transient(e.__cause__))
+                if not transient or attempt == TRANSFER_RETRIES - 1:
+                    raise
+                time.sleep(2 ** attempt)
+    
     def get_document_url(self, filename: str) -> str:
-        """Get the public URL for a document."""
+        """Get the public URL for a document (presigned S3 URLs are cached by the adapter)."""
         return self.storage.get_document_url(filename)
     
     def cleanup_temp(self, filename: Optional[str] = None):
         """Clean up temporary files."""
         if filename:
-            temp_path = os.path.join(self.temp_dir, filename)
-            if os.path.exists(temp_path):
-                os.remove(temp_path)
+            temp_path = self._leaf(filename)
+            # Not one of ours (or already cleaned up): nothing to stat or remove.
+            # Edits not uploaded yet are never removed
+            if temp_path not in self._live or temp_path in self._dirty:
+                return
+            self._uncache_local(temp_path)
+            self._live.discard(temp_path)
+            self._sig.pop(temp_path, None)
+            self._etag.pop(temp_path, None)
+            try:
+                os.unlink(temp_path)
+            except FileNotFoundError:
+                pass
         else:
+            # Nothing was written since the last full cleanup
+            if not self._created_any:
+                return
+            # Don't pull files out from under pending uploads
+            self.flush_uploads()
             # Clean up entire temp directory
-            import shutil
-            if os.path.exists(self.temp_dir):
-                shutil.rmtree(self.temp_dir)
+            shutil.rmtree(self.temp_dir, ignore_errors=True)
+            self._dir_alive = False
+            self._created_any = False
+            self._live.clear()
+            self._sig.clear()
+            self._etag.clear()
+            with self._lock:
+                self._lru.clear()
+                self._lru_bytes = 0
+
+
+@dataclass
+class ToolResult:
+    """Result of a storage-synced tool call that saved a document."""
+    message: str
+    url: str
+    download_url: str
+    
+    def __str__(self) -> str:
+        return f"{self.message}\n\nDocument URL: {self.url}\nDownload URL: {self.download_url}"
 
 
 # Global document manager instance
@@ -91,8 +579,18 @@ def with_storage_sync(tool_func):
     """
     Decorator that automatically handles storage sync for document operations.
     Downloads document before operation, uploads after.
+    
+    When the tool modified the document, its string result is returned as a
+    ToolResult carrying the document URL.
     """
+    manager: Optional[DocumentManager] = None
+    # The tool's name never changes, so classify it once here
+    name_lc = tool_func.__name__.lower()
+    create_if_missing = 'create' in name_lc or 'add' in name_lc
+    download = tool_func.__name__ not in OVERWRITING_TOOLS
+    
     async def wrapper(*args, **kwargs):
+        nonlocal manager
         # Find filename parameter
         filename = kwargs.get('filename') or kwargs.get('source_filename')
         
@@ -100,12 +598,15 @@ def with_storage_sync(tool_func):
             # No filename, just call the tool normally
             return await tool_func(*args, **kwargs)
         
-        manager = get_document_manager()
+        if manager is None:
+            manager = get_document_manager()
+        # Documents are stored by basename; use it for every storage step
+        base = os.path.basename(filename)
+        local_path = None
         
         try:
             # Get local path (downloads if exists, creates if new)
-            create_if_missing = 'create' in tool_func.__name__.lower() or 'add' in tool_func.__name__.lower()
-            local_path = manager.get_local_path(filename, create_if_missing=create_if_missing)
+            local_path = manager.get_local_path(base, create_if_missing=create_if_missing, download=download)
             
             # Update kwargs with local path
             if 'filename' in kwargs:
@@ -115,24 +616,32 @@ def with_storage_sync(tool_func):
             
             # Call the tool function
             result = await tool_func(*args, **kwargs)
-            
-            # Upload back to storage (if document was modified)
-            if os.path.exists(local_path):
-                doc_url = manager.save_document(local_path, os.path.basename(filename))
-                # Enhance result with URL
-                if isinstance(result, str):
-                    result = f"{result}\n\nDocument URL: {doc_url}\nDownload URL: {doc_url}"
-            
-            return result
         
         except FileNotFoundError as e:
+            # Nothing was downloaded or edited, so there is nothing to upload
+            if local_path is not None:
+                manager.release_local_path(local_path, base, modified=False)
             return f"Error: {str(e)}"
         except Exception as e:
+            # Don't upload a failed edit; earlier pending edits are still uploaded
+            if local_path is not None:
+                manager.release_local_path(local_path, base, modified=False)
             return f"Error: {str(e)}"
-        finally:
-            # Cleanup temp file
-            if filename:
-                manager.cleanup_temp(os.path.basename(filename))
+        
+        else:
+            # Upload back to storage (only if the document was modified).
+            # The upload removes the temp file itself once it has landed.
+            modified = manager.is_modified(local_path)
+            manager.release_local_path(local_path, base, modified)
+            if isinstance(result, str):
+                result = manager.display_text(result, local_path, base)
+            
+            if modified and isinstance(result, str):
+                # Attach the URL; str(result) renders the combined message
+                doc_url = manager.get_document_url(base)
+                result = ToolResult(message=result, url=doc_url, download_url=doc_url)
+            
+            return result
     
     return wrapper
 
@@ -6,10 +6,23 @@ Force deploy: 2025-11-07
 """
 
 import os
+import re
 import json
+import queue
+import atexit
+import logging
+import socket
 import asyncio
-from http.server import HTTPServer, BaseHTTPRequestHandler
-from urllib.parse import urlparse
+import selectors
+import tempfile
+import time
+import typing
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, quote, unquote
+from logging.handlers import QueueHandler, QueueListener
 import sys
 import inspect
 
@@ -30,6 +43,21 @@ from word_document_server.tools import template_tools, document_formatting_tools
 from document_manager import get_document_manager
 from storage_adapter import get_storage_adapter
 
+try:
+    import orjson
+    _dumps = orjson.dumps
+    _loads = orjson.loads
+except ImportError:
+    def _dumps(obj) -> bytes:
+        return json.dumps(obj).encode('utf-8')
+    _loads = json.loads
+
+try:
+    from streaming_form_data import StreamingFormDataParser
+    from streaming_form_data.targets import FileTarget
+except ImportError:
+    StreamingFormDataParser = None
+
 # Document storage directory
 DOCUMENTS_DIR = os.getenv('DOCUMENTS_DIR', './documents')
 BASE_URL = os.getenv('BASE_URL', '')  # Will be set from Render service URL
@@ -37,12 +65,242 @@ BASE_URL = os.getenv('BASE_URL', '')  # Will be set from Render service URL
 # Ensure documents directory exists
 os.makedirs(DOCUMENTS_DIR, exist_ok=True)
 
+# Both are process-wide singletons; bind them once for the request handlers
+DOC_MANAGER = get_document_manager()
+STORAGE = get_storage_adapter()
+
+# Number of requests handled concurrently
+WORKERS = int(os.getenv('WORKERS', min(32, (os.cpu_count() or 4) * 4)))
+# Seconds an idle keep-alive connection is kept open, and the longest wait
+# for the rest of a request once it has started arriving
+KEEPALIVE_TIMEOUT = float(os.getenv('KEEPALIVE_TIMEOUT', '15'))
+# Total bytes of served documents kept in memory, and the largest one cached
+DOC_CACHE_MAX_BYTES = int(os.getenv('DOC_CACHE_BYTES', 64 << 20))
+DOC_CACHE_ITEM_MAX = 4 << 20
+# Request bodies are read in chunks of this size when streamed to disk
+UPLOAD_CHUNK = 64 << 10
+# Largest request bodies accepted for JSON-RPC calls and template uploads
+MAX_JSON_BODY = int(os.getenv('MAX_JSON_BODY', 16 << 20))
+MAX_UPLOAD = int(os.getenv('MAX_UPLOAD', 200 << 20))
+# Kernel send buffer per connection, large enough for most documents in one go
+SEND_BUFFER = 1 << 20
+# Response bytes collected per connection before a write; headers and a JSON
+# body that fit go out together
+WRITE_BUFFER = 64 << 10
+
+# Workers only enqueue log records; a single listener thread formats and writes them
+logger = logging.getLogger("mcp")
+logger.setLevel(logging.INFO)
+logger.propagate = False
+_log_queue = queue.SimpleQueue()
+logger.addHandler(QueueHandler(_log_queue))
+_log_listener = QueueListener(_log_queue, logging.StreamHandler(sys.stdout))
+_log_listener.start()
+atexit.register(_log_listener.stop)
+
+# Each worker thread keeps one event loop for its whole lifetime
+_LOOP_TLS = threading.local()
+
+
+def _run_coro(coro):
+    """Run a coroutine on the calling thread's persistent event loop."""
+    loop = getattr(_LOOP_TLS, 'loop', None)
+    if loop is None or loop.is_closed():
+        loop = _LOOP_TLS.loop = asyncio.new_event_loop()
+    return loop.run_until_complete(coro)
+
+# filename -> (etag, content), least recently served first
+_DOC_CACHE: "OrderedDict[str, tuple]" = OrderedDict()
+_DOC_CACHE_LOCK = threading.Lock()
+_doc_cache_bytes = 0
+
+
+def _doc_cache_get(filename: str, etag: str):
+    """Return cached content for filename if it is still at this etag."""
+    with _DOC_CACHE_LOCK:
+        entry = _DOC_CACHE.get(filename)
+        if entry is None or entry[0] != etag:
+            return None
+        _DOC_CACHE.move_to_end(filename)
+        return entry[1]
+
+
+def _doc_cache_put(filename: str, etag: str, content: bytes):
+    """Cache a served document, evicting the least recently served ones."""
+    global _doc_cache_bytes
+    if len(content) > DOC_CACHE_ITEM_MAX:
+        return
+    with _DOC_CACHE_LOCK:
+        old = _DOC_CACHE.pop(filename, None)
+        if old is not None:
+            _doc_cache_bytes -= len(old[1])
+        _DOC_CACHE[filename] = (etag, content)
+        _doc_cache_bytes += len(content)
+        while _doc_cache_bytes > DOC_CACHE_MAX_BYTES:
+            _, (_, evicted) = _DOC_CACHE.popitem(last=False)
+            _doc_cache_bytes -= len(evicted)
+
+
+def _invalidate_doc(filename: str):
+    """Drop a document from the served-document cache."""
+    global _doc_cache_bytes
+    with _DOC_CACHE_LOCK:
+        old = _DOC_CACHE.pop(filename, None)
+        if old is not None:
+            _doc_cache_bytes -= len(old[1])
+
+
+def _stored_name(filename: str) -> str:
+    """Get the name a document argument is stored under: its basename, with .docx added as the tools do."""
+    name = os.path.basename(filename)
+    if not name.endswith('.docx'):
+        name += '.docx'
+    return name
+
+
+# Tools that may be called on a document that doesn't exist yet
+CREATE_TOOLS = frozenset({'create_document', 'copy_document'})
+
+# Tools that only read their document; nothing is uploaded after they run
+READONLY_TOOLS = frozenset({
+    'get_document_info',
+    'get_document_text',
+    'get_document_outline',
+    'get_document_xml',
+    'list_available_documents',
+    'get_paragraph_text_from_document',
+    'find_text_in_document',
+    'convert_to_pdf',
+    'get_all_comments',
+    'get_comments_by_author',
+    'get_comments_for_paragraph',
+    'get_header_info',
+    'validate_document_footnotes',
+    'get_template_info',
+})
+
 # Build tool registry by inspecting all tool modules
 TOOL_REGISTRY = {}
+TOOL_SCHEMAS = {}
+TOOLS_LIST = []
+# Serialized tools/list response with a placeholder id, filled in per request
+_TOOLS_LIST_TEMPLATE = b''
+_TOOLS_LIST_ID = b'"__ID__"'
+_TOOLS_LIST_GET = (b'', b'')
+
+
+def _static_response(body: bytes) -> tuple:
+    """
+    Build a complete 200 JSON response, headers included, for a fixed body.
+    
+    Returns the keep-alive and the close variant, indexed by the handler's
+    close_connection flag.
+    """
+    def build(connection: str) -> bytes:
+        head = (
+            "HTTP/1.1 200 OK\r\n"
+            "Content-Type: application/json\r\n"
+            "Access-Control-Allow-Origin: *\r\n"
+            "Access-Control-Allow-Methods: GET, POST, OPTIONS\r\n"
+            "Access-Control-Allow-Headers: Content-Type\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {connection}\r\n"
+            "\r\n"
+        )
+        return head.encode('latin-1') + body
+    return build("keep-alive"), build("close")
+
+
+_HEALTH_RESPONSE = _static_response(_dumps({"status": "ok"}))
+# "name: description" lines in a tool docstring's Args section
+_PARAM_LINE = re.compile(r"^[ \t]*(\w+):[ \t]*(.+)$", re.M)
+
+
+def _parse_docstring_params(doc: str) -> dict:
+    """Map each documented parameter name to its one-line description."""
+    params = {}
+    for name, desc in _PARAM_LINE.findall(doc or ""):
+        params.setdefault(name, desc.strip())
+    return params
+
+
+def _get_tool_schema(tool_func):
+    """Extract JSON schema from tool function signature."""
+    sig = inspect.signature(tool_func)
+    
+    properties = {}
+    required = []
+    
+    # Parse the docstring once for better descriptions
+    param_docs = _parse_docstring_params(tool_func.__doc__)
+    
+    for param_name, param in sig.parameters.items():
+        if param_name == 'self':
+            continue
+        
+        param_type = param.annotation
+        param_default = param.default
+        
+        # Handle Optional types
+        if hasattr(typing, 'get_origin') and typing.get_origin(param_type) is typing.Union:
+            args = typing.get_args(param_type)
+            # If Union includes None, it's Optional
+            if type(None) in args:
+                # Get the actual type (not None)
+                param_type = next((arg for arg in args if arg is not type(None)), str)
+        
+        # Map Python types to JSON schema types
+        prop_schema = {}
+        
+        if param_type == str or param_type == inspect.Parameter.empty or param_type == type(None):
+            prop_schema["type"] = "string"
+        elif param_type == int:
+            prop_schema["type"] = "integer"
+        elif param_type == float:
+            prop_schema["type"] = "number"
+        elif param_type == bool:
+            prop_schema["type"] = "boolean"
+        elif param_type == list or (hasattr(typing, '_GenericAlias') and 'list' in str(param_type)):
+            prop_schema["type"] = "array"
+            prop_schema["items"] = {"type": "string"}  # Default to string array
+        elif param_type == dict:
+            prop_schema["type"] = "object"
+        else:
+            prop_schema["type"] = "string"
+        
+        # Add enum constraints for known parameters
+        if param_name == 'position':
+            prop_schema["enum"] = ["before", "after"]
+            prop_schema["description"] = "Position relative to target: 'before' or 'after'"
+        elif param_name == 'bullet_type':
+            prop_schema["enum"] = ["bullet", "number"]
+            prop_schema["description"] = "List type: 'bullet' for bullets (•) or 'number' for numbered (1,2,3)"
+        elif param_name == 'list_items':
+            prop_schema["description"] = "Array of strings, each as a list item"
+        else:
+            # Take the description from the docstring when documented
+            prop_schema["description"] = param_docs.get(param_name, f"Parameter: {param_name}")
+        
+        properties[param_name] = prop_schema
+        
+        # Only require if no default value
+        if param_default == inspect.Parameter.empty:
+            required.append(param_name)
+    
+    schema = {
+        "type": "object",
+        "properties": properties
+    }
+    
+    if required:
+        schema["required"] = required
+    
+    return schema
+
 
 def build_tool_registry():
     """Build a registry of all available tools."""
-    global TOOL_REGISTRY
+    global TOOL_REGISTRY, TOOL_SCHEMAS, TOOLS_LIST, _TOOLS_LIST_TEMPLATE, _TOOLS_LIST_GET
     
     # Map of tool names to their functions
     tools_map = {
@@ -109,6 +367,29 @@ def build_tool_registry():
     }
     
     TOOL_REGISTRY = tools_map
+    
+    # Signatures never change at runtime, so build the tools/list payload once
+    TOOL_SCHEMAS = {name: _get_tool_schema(func) for name, func in tools_map.items()}
+    TOOLS_LIST = [
+        {
+            "name": name,
+            "description": func.__doc__ or f"Tool: {name}",
+            "inputSchema": TOOL_SCHEMAS[name]
+        }
+        for name, func in tools_map.items()
+    ]
+    _TOOLS_LIST_TEMPLATE = _dumps({
+        "jsonrpc": "2.0",
+        "id": "__ID__",
+        "result": {"tools": TOOLS_LIST}
+    })
+    _TOOLS_LIST_GET = _static_response(tools_list_body(1))
+
+
+def tools_list_body(request_id) -> bytes:
+    """Return the encoded tools/list response for a given JSON-RPC id."""
+    # The id precedes the tools in the template, so only the first match is replaced
+    return _TOOLS_LIST_TEMPLATE.replace(_TOOLS_LIST_ID, _dumps(request_id), 1)
 
 # Build registry on import
 build_tool_registry()
@@ -117,10 +398,73 @@ build_tool_registry()
 class MCPHTTPHandler(BaseHTTPRequestHandler):
     """HTTP handler for MCP JSON-RPC requests and document serving."""
     
+    # Keep connections open between requests; every response sets Content-Length
+    protocol_version = "HTTP/1.1"
+    # Bounds reads of a request in progress; idle connections wait in the server
+    timeout = KEEPALIVE_TIMEOUT
+    # Buffered wfile: handle_one_request() flushes it once the response is complete
+    wbufsize = WRITE_BUFFER
+    
+    def setup(self):
+        """Tune the accepted socket before the stream wrappers are created."""
+        super().setup()
+        try:
+            # Responses are written whole, so Nagle only adds latency
+            self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self.connection.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SEND_BUFFER)
+        except OSError:
+            pass
+    
+    def handle(self):
+        """Serve the requests the client has sent so far; the server waits for the next one."""
+        self.close_connection = True
+        try:
+            self.handle_one_request()
+            while not self.close_connection and self._request_buffered():
+                self.handle_one_request()
+        except BaseException:
+            self.close_connection = True
+            raise
+    
+    def resume(self):
+        """Serve a request that arrived on a connection the server was holding idle."""
+        try:
+            self.handle()
+        finally:
+            self.finish()
+    
+    def finish(self):
+        """Close the streams only when the connection ends; a kept-alive one is reused."""
+        if self.close_connection:
+            super().finish()
+    
+    def _request_buffered(self) -> bool:
+        """Whether another request was pipelined behind the last one, without blocking."""
+        self.connection.settimeout(0)
+        try:
+            return bool(self.rfile.peek(1))
+        except OSError:
+            return False
+        finally:
+            self.connection.settimeout(self.timeout)
+    
+    def end_headers_with_body(self, body: bytes):
+        """Finish the headers and queue the body behind them in the write buffer."""
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def send_static(self, response: tuple):
+        """Write a prebuilt response from _static_response in one go."""
+        # parse_request set close_connection from the request's version and
+        # Connection header, so an HTTP/1.0 or "Connection: close" client is
+        # told the connection closes, as it will right after this response
+        self.wfile.write(response[self.close_connection])
+    
     def do_OPTIONS(self):
         """Handle CORS preflight requests."""
         self.send_response(200)
         self.send_cors_headers()
+        self.send_header('Content-Length', '0')
         self.end_headers()
     
     def send_cors_headers(self):
@@ -130,28 +474,26 @@ class MCPHTTPHandler(BaseHTTPRequestHandler):
         self.send_header('Access-Control-Allow-Headers', 'Content-Type')
         self.send_header('Content-Type', 'application/json')
     
+    def send_json(self, payload, status: int = 200):
+        """Send a JSON response with an explicit Content-Length."""
+        self.send_body(_dumps(payload), status)
+    
+    def send_body(self, body: bytes, status: int = 200):
+        """Send an already encoded JSON body."""
+        self.send_response(status)
+        self.send_cors_headers()
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers_with_body(body)
+    
     def do_GET(self):
         """Handle GET requests for tool discovery and document serving."""
         parsed_path = urlparse(self.path)
         path = parsed_path.path
         
-        # Tool discovery endpoint
+        # Tool discovery endpoint; the static responses are written whole,
+        # skipping send_response and the access log line it produces
         if path == '/mcp/stream' or path == '/mcp/tools':
-            try:
-                request = {
-                    "jsonrpc": "2.0",
-                    "id": 1,
-                    "method": "tools/list",
-                    "params": {}
-                }
-                response = asyncio.run(self.handle_mcp_request(request))
-                
-                self.send_response(200)
-                self.send_cors_headers()
-                self.end_headers()
-                self.wfile.write(json.dumps(response).encode('utf-8'))
-            except Exception as e:
-                self.send_error(500, f"Error: {str(e)}")
+            self.send_static(_TOOLS_LIST_GET)
         
         # Document serving endpoint
         elif path.startswith('/documents/'):
@@ -160,19 +502,13 @@ class MCPHTTPHandler(BaseHTTPRequestHandler):
         
         # Health check
         elif path == '/health':
-            self.send_response(200)
-            self.send_cors_headers()
-            self.end_headers()
-            self.wfile.write(json.dumps({"status": "ok"}).encode('utf-8'))
+            self.send_static(_HEALTH_RESPONSE)
         
         # Template info endpoint
         elif path == '/template/info':
             try:
-                info = asyncio.run(template_tools.get_template_info())
-                self.send_response(200)
-                self.send_cors_headers()
-                self.end_headers()
-                self.wfile.write(json.dumps({"info": info}).encode('utf-8'))
+                info = _run_coro(template_tools.get_template_info())
+                self.send_json({"info": info})
             except Exception as e:
                 self.send_error(500, f"Error: {str(e)}")
         
@@ -191,16 +527,21 @@ class MCPHTTPHandler(BaseHTTPRequestHandler):
         
         if path == '/mcp/stream':
             content_length = int(self.headers.get('Content-Length', 0))
-            body = self.rfile.read(content_length).decode('utf-8')
+            if content_length > MAX_JSON_BODY:
+                self.send_error(413, f"Request body exceeds {MAX_JSON_BODY} bytes")
+                return
+            body = self.rfile.read(content_length)
             
             try:
-                request = json.loads(body)
-                response = asyncio.run(self.handle_mcp_request(request))
-                
-                self.send_response(200)
-                self.send_cors_headers()
-                self.end_headers()
-                self.wfile.write(json.dumps(response).encode('utf-8'))
+                request = _loads(body)
+                if isinstance(request, dict) and request.get('method') == 'tools/list':
+                    self.send_body(tools_list_body(request.get('id')))
+                    return
+                if isinstance(request, list):
+                    response = _run_coro(self.handle_mcp_batch(request))
+                else:
+                    response = _run_coro(self.handle_mcp_request(request))
+                self.send_json(response)
             except json.JSONDecodeError as e:
                 self.send_error(400, f"Invalid JSON: {str(e)}")
             except Exception as e:
@@ -232,19 +573,11 @@ class MCPHTTPHandler(BaseHTTPRequestHandler):
                 }
             
             elif method == 'tools/list':
-                tools = []
-                for tool_name, tool_func in TOOL_REGISTRY.items():
-                    tools.append({
-                        "name": tool_name,
-                        "description": tool_func.__doc__ or f"Tool: {tool_name}",
-                        "inputSchema": self._get_tool_schema(tool_func)
-                    })
-                
                 return {
                     "jsonrpc": "2.0",
                     "id": request_id,
                     "result": {
-                        "tools": tools
+                        "tools": TOOLS_LIST
                     }
                 }
             
@@ -264,102 +597,13 @@ class MCPHTTPHandler(BaseHTTPRequestHandler):
                 
                 tool_func = TOOL_REGISTRY[tool_name]
                 
-                # Use storage adapter for document operations
-                manager = get_document_manager()
-                storage = get_storage_adapter()
-                
-                # Handle filename parameters - download from storage if exists
-                original_filename = None
-                local_path = None
-                
-                if 'filename' in arguments:
-                    original_filename = arguments['filename']
-                    # Extract just the filename (remove path if present)
-                    filename_base = os.path.basename(original_filename)
-                    
-                    # Check if document exists in storage
-                    create_if_missing = 'create' in tool_name or 'add' in tool_name
-                    try:
-                        local_path = manager.get_local_path(filename_base, create_if_missing=create_if_missing)
-                        arguments['filename'] = local_path
-                    except FileNotFoundError:
-                        if create_if_missing:
-                            local_path = manager.get_local_path(filename_base, create_if_missing=True)
-                            arguments['filename'] = local_path
-                        else:
-                            return {
-                                "jsonrpc": "2.0",
-                                "id": request_id,
-                                "error": {
-                                    "code": -32602,
-                                    "message": f"Document {filename_base} not found"
-                                }
-                            }
-                
-                if 'source_filename' in arguments:
-                    source_filename_base = os.path.basename(arguments['source_filename'])
-                    try:
-                        source_local_path = manager.get_local_path(source_filename_base, create_if_missing=False)
-                        arguments['source_filename'] = source_local_path
-                    except FileNotFoundError:
-                        return {
-                            "jsonrpc": "2.0",
-                            "id": request_id,
-                            "error": {
-                                "code": -32602,
-                                "message": f"Source document {source_filename_base} not found"
-                            }
-                        }
-                
-                try:
-                    # Call the tool
-                    if asyncio.iscoroutinefunction(tool_func):
-                        result = await tool_func(**arguments)
-                    else:
-                        result = tool_func(**arguments)
-                    
-                    # Upload document back to storage if it was modified
-                    if local_path and os.path.exists(local_path):
-                        # Get the original filename (before we changed it to local_path)
-                        if original_filename:
-                            filename_base = os.path.basename(original_filename)
-                        else:
-                            # Extract from arguments
-                            filename_base = os.path.basename(arguments.get('filename', ''))
-                        
-                        # Ensure .docx extension
-                        if filename_base and not filename_base.endswith('.docx'):
-                            filename_base = f"{filename_base}.docx"
-                        
-                        if filename_base:
-                            # Save to storage
-                            doc_url = manager.save_document(local_path, filename_base)
-                            # Enhance result with URL
-                            if isinstance(result, str):
-                                from urllib.parse import quote
-                                # URL encode the filename for the download URL
-                                encoded_filename = quote(filename_base)
-                                download_url = f"{BASE_URL or 'https://office-word-mcp.onrender.com'}/documents/{encoded_filename}"
-                                result = f"{result}\n\nDocument saved: {filename_base}\nDownload URL: {download_url}"
-                    
-                    enhanced_result = str(result)
-                finally:
-                    # Cleanup temp files
-                    if local_path and os.path.exists(local_path):
-                        manager.cleanup_temp(os.path.basename(local_path))
-                
-                return {
-                    "jsonrpc": "2.0",
-                    "id": request_id,
-                    "result": {
-                        "content": [
-                            {
-                                "type": "text",
-                                "text": enhanced_result
-                            }
-                        ]
-                    }
-                }
+                # Serialize concurrent calls that work on the same document, under
+                # the stored name (.docx added) so "foo" and "foo.docx" share a lock
+                target = arguments.get('filename') or arguments.get('source_filename')
+                if not target:
+                    return await self._call_tool(tool_name, tool_func, arguments, request_id)
+                with DOC_MANAGER.document_lock(_stored_name(target)):
+                    return await self._call_tool(tool_name, tool_func, arguments, request_id)
             
             else:
                 return {
@@ -372,8 +616,7 @@ class MCPHTTPHandler(BaseHTTPRequestHandler):
                 }
         
         except Exception as e:
-            import traceback
-            traceback.print_exc()
+            logger.exception("Error handling %s request", method)
             return {
                 "jsonrpc": "2.0",
                 "id": request_id,
@@ -383,87 +626,134 @@ class MCPHTTPHandler(BaseHTTPRequestHandler):
                 }
             }
     
-    def _get_tool_schema(self, tool_func):
-        """Extract JSON schema from tool function signature."""
-        import typing
-        sig = inspect.signature(tool_func)
-        
-        properties = {}
-        required = []
-        
-        # Get docstring for better descriptions
-        docstring = tool_func.__doc__ or ""
+    async def handle_mcp_batch(self, requests: list):
+        """Handle a JSON-RPC batch, answering every request in one response."""
+        if not requests:
+            return {
+                "jsonrpc": "2.0",
+                "id": None,
+                "error": {
+                    "code": -32600,
+                    "message": "Invalid Request: empty batch"
+                }
+            }
         
-        for param_name, param in sig.parameters.items():
-            if param_name == 'self':
+        # Requests run in order: later calls may depend on earlier edits, and
+        # the per-document locks must not be held across concurrent tasks
+        responses = []
+        for request in requests:
+            if not isinstance(request, dict):
+                responses.append({
+                    "jsonrpc": "2.0",
+                    "id": None,
+                    "error": {
+                        "code": -32600,
+                        "message": "Invalid Request"
+                    }
+                })
                 continue
+            responses.append(await self.handle_mcp_request(request))
+        return responses
+    
+    async def _call_tool(self, tool_name: str, tool_func, arguments: dict, request_id):
+        """Run one tool call, syncing its documents with storage."""
+        # Handle filename parameters - download from storage if exists
+        filename_base = None
+        local_path = None
+        source_local_path = None
+        source_filename_base = None
+        released = False
+        
+        if 'filename' in arguments:
+            # Extract just the filename (remove path if present); the tools add
+            # .docx themselves, so the temp copy and the stored name must have it too
+            filename_base = _stored_name(arguments['filename'])
             
-            param_type = param.annotation
-            param_default = param.default
-            
-            # Handle Optional types
-            if hasattr(typing, 'get_origin') and typing.get_origin(param_type) is typing.Union:
-                args = typing.get_args(param_type)
-                # If Union includes None, it's Optional
-                if type(None) in args:
-                    # Get the actual type (not None)
-                    param_type = next((arg for arg in args if arg is not type(None)), str)
-            
-            # Map Python types to JSON schema types
-            prop_schema = {}
-            
-            if param_type == str or param_type == inspect.Parameter.empty or param_type == type(None):
-                prop_schema["type"] = "string"
-            elif param_type == int:
-                prop_schema["type"] = "integer"
-            elif param_type == float:
-                prop_schema["type"] = "number"
-            elif param_type == bool:
-                prop_schema["type"] = "boolean"
-            elif param_type == list or (hasattr(typing, '_GenericAlias') and 'list' in str(param_type)):
-                prop_schema["type"] = "array"
-                prop_schema["items"] = {"type": "string"}  # Default to string array
-            elif param_type == dict:
-                prop_schema["type"] = "object"
+            # Check if document exists in storage
+            create_if_missing = tool_name in CREATE_TOOLS
+            try:
+                local_path = DOC_MANAGER.get_local_path(filename_base, create_if_missing=create_if_missing)
+                arguments['filename'] = local_path
+            except FileNotFoundError:
+                if create_if_missing:
+                    local_path = DOC_MANAGER.get_local_path(filename_base, create_if_missing=True)
+                    arguments['filename'] = local_path
+                else:
+                    return {
+                        "jsonrpc": "2.0",
+                        "id": request_id,
+                        "error": {
+                            "code": -32602,
+                            "message": f"Document {filename_base} not found"
+                        }
+                    }
+        
+        if 'source_filename' in arguments:
+            source_filename_base = _stored_name(arguments['source_filename'])
+            try:
+                source_local_path = DOC_MANAGER.get_local_path(source_filename_base, create_if_missing=False)
+                arguments['source_filename'] = source_local_path
+            except FileNotFoundError:
+                return {
+                    "jsonrpc": "2.0",
+                    "id": request_id,
+                    "error": {
+                        "code": -32602,
+                        "message": f"Source document {source_filename_base} not found"
+                    }
+                }
+        
+        try:
+            # Call the tool
+            if asyncio.iscoroutinefunction(tool_func):
+                result = await tool_func(**arguments)
             else:
-                prop_schema["type"] = "string"
+                result = tool_func(**arguments)
             
-            # Add enum constraints for known parameters
-            if param_name == 'position':
-                prop_schema["enum"] = ["before", "after"]
-                prop_schema["description"] = "Position relative to target: 'before' or 'after'"
-            elif param_name == 'bullet_type':
-                prop_schema["enum"] = ["bullet", "number"]
-                prop_schema["description"] = "List type: 'bullet' for bullets (•) or 'number' for numbered (1,2,3)"
-            elif param_name == 'list_items':
-                prop_schema["description"] = "Array of strings, each as a list item"
-            else:
-                # Try to extract description from docstring
-                desc = f"Parameter: {param_name}"
-                if docstring:
-                    # Look for param_name in docstring
-                    import re
-                    pattern = rf"{param_name}:\s*([^\n]+)"
-                    match = re.search(pattern, docstring)
-                    if match:
-                        desc = match.group(1).strip()
-                prop_schema["description"] = desc
+            if tool_name in READONLY_TOOLS:
+                # Nothing to upload; keep the copy for the next call
+                if local_path:
+                    DOC_MANAGER.release_local_path(local_path, filename_base, modified=False)
+                    released = True
             
-            properties[param_name] = prop_schema
+            # Upload document back to storage if it was modified
+            elif local_path and os.path.exists(local_path):
+                # Save to storage, keeping the uploaded copy cached for the next call
+                doc_url = DOC_MANAGER.submit_upload(local_path, filename_base, release=True).result()
+                released = True
+                _invalidate_doc(filename_base)
+                # Enhance result with URL
+                if isinstance(result, str):
+                    # URL encode the filename for the download URL
+                    encoded_filename = quote(filename_base)
+                    download_url = f"{BASE_URL or 'https://office-word-mcp.onrender.com'}/documents/{encoded_filename}"
+                    result = f"{result}\n\nDocument saved: {filename_base}\nDownload URL: {download_url}"
             
-            # Only require if no default value
-            if param_default == inspect.Parameter.empty:
-                required.append(param_name)
+            # Tools echo the temp paths they were given; name the documents instead
+            enhanced_result = str(result)
+            if local_path:
+                enhanced_result = DOC_MANAGER.display_text(enhanced_result, local_path, filename_base)
+            if source_local_path:
+                enhanced_result = DOC_MANAGER.display_text(enhanced_result, source_local_path, source_filename_base)
+        finally:
+            # Cleanup temp files; unchanged sources stay in the local cache
+            if local_path and not released:
+                DOC_MANAGER.cleanup_temp(filename_base)
+            if source_local_path:
+                DOC_MANAGER.release_local_path(source_local_path, source_filename_base, modified=False)
         
-        schema = {
-            "type": "object",
-            "properties": properties
+        return {
+            "jsonrpc": "2.0",
+            "id": request_id,
+            "result": {
+                "content": [
+                    {
+                        "type": "text",
+                        "text": enhanced_result
+                    }
+                ]
+            }
         }
-        
-        if required:
-            schema["required"] = required
-        
-        return schema
     
     def _enhance_result_with_url(self, result: str, arguments: dict):
         """Enhance tool result with document URL if applicable."""
@@ -485,130 +775,312 @@ class MCPHTTPHandler(BaseHTTPRequestHandler):
     
     def serve_document(self, filename: str):
         """Serve a document file from storage."""
-        from urllib.parse import unquote
-        
         # URL decode the filename (handle %20 for spaces, etc.)
         filename = unquote(filename)
         # Security: prevent directory traversal
         filename = os.path.basename(filename)
         
         try:
-            storage = get_storage_adapter()
-            manager = get_document_manager()
+            # Look up, open and (when small) read the document under its lock, so
+            # a tool call saving it can't interleave; a large file is streamed
+            # after the lock is released from the descriptor opened under it
+            with DOC_MANAGER.document_lock(filename):
+                # The etag doubles as the existence check and the cache key
+                etag = STORAGE.get_document_etag(filename)
+                content = f = None
+                if etag is not None:
+                    content = _doc_cache_get(filename, etag)
+                if etag is not None and content is None:
+                    # Stream from storage without a temp file round trip
+                    f = DOC_MANAGER.open_document(filename)
+                    try:
+                        size = f.seek(0, os.SEEK_END)
+                        f.seek(0)
+                        if size <= DOC_CACHE_ITEM_MAX:
+                            content = f.read()
+                            _doc_cache_put(filename, etag, content)
+                    except BaseException:
+                        f.close()
+                        raise
+                    if content is not None:
+                        f.close()
+                        f = None
             
-            # Check if document exists in storage first
-            if not storage.document_exists(filename):
+            if etag is None:
                 self.send_error(404, f"Document '{filename}' not found")
-                return
-            
-            # Download from storage to temp location
-            local_path = manager.get_local_path(filename, create_if_missing=False)
-            
-            if not os.path.exists(local_path):
-                self.send_error(404, f"Document '{filename}' not found on disk")
-                return
-            
-            with open(local_path, 'rb') as f:
-                content = f.read()
-            
-            self.send_response(200)
-            self.send_header('Content-Type', 'application/vnd.openxmlformats-officedocument.wordprocessingml.document')
-            self.send_header('Content-Disposition', f'attachment; filename="{filename}"')
-            self.send_header('Content-Length', str(len(content)))
-            self.send_cors_headers()
-            self.end_headers()
-            self.wfile.write(content)
-            
-            # Cleanup temp file
-            manager.cleanup_temp(filename)
+            elif f is None:
+                self.send_document_headers(filename, len(content))
+                self.end_headers_with_body(content)
+            else:
+                with f:
+                    self.send_document_headers(filename, size)
+                    self.end_headers()
+                    self.send_file(f)
         except FileNotFoundError as e:
             self.send_error(404, f"Document not found: {str(e)}")
         except Exception as e:
-            import traceback
-            traceback.print_exc()
+            logger.exception("Error serving document %s", filename)
             self.send_error(500, f"Error serving document: {str(e)}")
     
+    def send_document_headers(self, filename: str, size: int):
+        """Queue the status line and headers for a document download; the caller ends them."""
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/vnd.openxmlformats-officedocument.wordprocessingml.document')
+        self.send_header('Content-Disposition', f'attachment; filename="{filename}"')
+        self.send_header('Content-Length', str(size))
+        self.send_cors_headers()
+    
+    def send_file(self, f):
+        """Copy an open file to the client, in kernel space where possible."""
+        # An in-memory spool has no descriptor, and asking for one writes it to disk
+        if isinstance(f, tempfile.SpooledTemporaryFile) and not f._rolled:
+            self.wfile.write(f.read())
+            return
+        # socket.sendfile loops over os.sendfile and falls back to send() on
+        # platforms or sockets (e.g. SSL) where sendfile is unavailable. It
+        # writes to the socket directly, so the buffered headers go out first
+        self.wfile.flush()
+        self.connection.sendfile(f)
+    
+    def read_body_chunks(self, content_length: int):
+        """Yield the request body in chunks of at most UPLOAD_CHUNK bytes."""
+        remaining = content_length
+        while remaining > 0:
+            chunk = self.rfile.read(min(remaining, UPLOAD_CHUNK))
+            if not chunk:
+                raise ConnectionError("Client closed the connection mid-upload")
+            remaining -= len(chunk)
+            yield chunk
+    
     def handle_template_upload(self):
         """Handle template file upload."""
+        tmp_path = None
         try:
             content_length = int(self.headers.get('Content-Length', 0))
             if content_length == 0:
                 self.send_error(400, "No file data received")
                 return
+            if content_length > MAX_UPLOAD:
+                self.send_error(413, f"Template exceeds {MAX_UPLOAD} bytes")
+                return
             
             content_type = self.headers.get('Content-Type', '')
+            template_path = template_tools.get_template_path()
+            template_dir = os.path.dirname(template_path)
+            os.makedirs(template_dir, exist_ok=True)
+            # The upload goes to a temp file next to the template and replaces it
+            # only once complete, so a failed or cut-off upload (or a create
+            # running meanwhile) never sees a partial template
+            fd, tmp_path = tempfile.mkstemp(dir=template_dir, prefix='.template-', suffix='.tmp')
+            os.close(fd)
             
             # Handle raw binary upload (application/octet-stream or Word document MIME type)
             if 'multipart' not in content_type.lower():
-                # Read the file data directly
-                file_data = self.rfile.read(content_length)
-                
-                # Save as template
-                template_path = template_tools.get_template_path()
-                os.makedirs(os.path.dirname(template_path), exist_ok=True)
-                
-                with open(template_path, 'wb') as f:
-                    f.write(file_data)
+                # Stream the body to the temp file
+                with open(tmp_path, 'wb', buffering=1 << 20) as f:
+                    for chunk in self.read_body_chunks(content_length):
+                        f.write(chunk)
+                os.replace(tmp_path, template_path)
+                tmp_path = None
                 
-                self.send_response(200)
-                self.send_cors_headers()
-                self.end_headers()
-                self.wfile.write(json.dumps({
+                self.send_json({
                     "success": True,
                     "message": "Template uploaded successfully",
                     "template_path": template_path,
-                    "size_bytes": len(file_data)
-                }).encode('utf-8'))
+                    "size_bytes": content_length
+                })
                 return
             
             # Handle multipart/form-data
-            # Parse multipart/form-data manually (cgi module removed in Python 3.13+)
-            boundary = content_type.split('boundary=')[1].strip()
-            data = self.rfile.read(content_length)
-            
-            # Find the file data between boundaries
-            parts = data.split(b'--' + boundary.encode())
-            file_data = None
-            
-            for part in parts:
-                if b'Content-Disposition: form-data; name="file"' in part:
-                    # Extract file data (after headers and blank line)
-                    file_start = part.find(b'\r\n\r\n')
-                    if file_start != -1:
-                        file_data = part[file_start + 4:]
-                        # Remove trailing boundary markers
-                        file_data = file_data.rstrip(b'\r\n--')
-                        break
-            
-            if file_data is None:
-                self.send_error(400, "No file field in form data. Use field name 'file'")
-                return
-            
-            # Save the uploaded file as template
-            template_path = template_tools.get_template_path()
-            os.makedirs(os.path.dirname(template_path), exist_ok=True)
-            
-            # Write the file data directly (already extracted from multipart)
-            with open(template_path, 'wb') as f:
-                f.write(file_data)
+            if StreamingFormDataParser is not None:
+                parser = StreamingFormDataParser(headers={'Content-Type': content_type})
+                target = FileTarget(tmp_path)
+                parser.register('file', target)
+                for chunk in self.read_body_chunks(content_length):
+                    parser.data_received(chunk)
+                
+                if target.multipart_filename is None:
+                    self.send_error(400, "No file field in form data. Use field name 'file'")
+                    return
+                uploaded_name = target.multipart_filename
+            else:
+                # Parse multipart/form-data manually (cgi module removed in Python 3.13+)
+                boundary = content_type.split('boundary=')[1].strip()
+                # Raises if the client disconnects, rather than parsing a cut-off body
+                data = b''.join(self.read_body_chunks(content_length))
+                
+                # Find the file data between boundaries
+                parts = data.split(b'--' + boundary.encode())
+                file_data = None
+                
+                for part in parts:
+                    if b'Content-Disposition: form-data; name="file"' in part:
+                        # Extract file data (after headers and blank line)
+                        file_start = part.find(b'\r\n\r\n')
+                        if file_start != -1:
+                            file_data = part[file_start + 4:]
+                            # Remove trailing boundary markers
+                            file_data = file_data.rstrip(b'\r\n--')
+                            break
+                
+                if file_data is None:
+                    self.send_error(400, "No file field in form data. Use field name 'file'")
+                    return
+                
+                # Write the file data (already extracted from multipart)
+                with open(tmp_path, 'wb') as f:
+                    f.write(file_data)
+                uploaded_name = os.path.basename(template_path)
             
-            self.send_response(200)
-            self.send_cors_headers()
-            self.end_headers()
-            self.wfile.write(json.dumps({
+            os.replace(tmp_path, template_path)
+            tmp_path = None
+            self.send_json({
                 "success": True,
-                "message": f"Template '{file_item.filename}' uploaded successfully",
+                "message": f"Template '{uploaded_name}' uploaded successfully",
                 "template_path": template_path
-            }).encode('utf-8'))
+            })
             
         except Exception as e:
-            import traceback
-            traceback.print_exc()
+            logger.exception("Error uploading template")
             self.send_error(500, f"Error uploading template: {str(e)}")
+        finally:
+            if tmp_path is not None:
+                try:
+                    os.unlink(tmp_path)
+                except FileNotFoundError:
+                    pass
+            template_tools.invalidate_template_cache()
     
     def log_message(self, format, *args):
-        """Override to use print instead of stderr."""
-        print(f"{self.address_string()} - {format % args}")
+        """Override to log to stdout through the queued logger instead of stderr."""
+        logger.info("%s - %s", self.address_string(), format % args)
+
+
+class MCPServer(ThreadingHTTPServer):
+    """
+    HTTP server that handles requests on a bounded pool of worker threads.
+    
+    Workers only run requests. Connections waiting for their first or next
+    request are watched by a single selector thread and handed to the pool
+    once a request arrives, so idle keep-alive clients never hold a worker.
+    """
+    
+    allow_reuse_address = True
+    daemon_threads = True
+    
+    def __init__(self, server_address, handler_class, max_workers: int = WORKERS):
+        super().__init__(server_address, handler_class)
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='http_worker')
+        # Connections to start watching: (socket, client address, handler or None)
+        self._parked = []
+        self._parked_lock = threading.Lock()
+        self._closing = False
+        # Written to when a connection is parked, to wake the selector
+        self._wakeup_r, self._wakeup_w = socket.socketpair()
+        self._wakeup_r.setblocking(False)
+        self._wakeup_w.setblocking(False)
+        self._watcher = threading.Thread(target=self._watch_idle, name='http_idle', daemon=True)
+        self._watcher.start()
+    
+    def process_request(self, request, client_address):
+        """Wait for the new connection's first request without holding a worker."""
+        self._park(request, client_address, None)
+    
+    def _park(self, request, client_address, handler):
+        with self._parked_lock:
+            if not self._closing:
+                self._parked.append((request, client_address, handler))
+                request = None
+        if request is not None:
+            self._close(request, handler)
+            return
+        try:
+            self._wakeup_w.send(b'\0')
+        except BlockingIOError:
+            # Already a wakeup pending
+            pass
+    
+    def _process(self, request, client_address, handler):
+        """Run the requests waiting on a connection, then park or close it."""
+        try:
+            if handler is None:
+                handler = self.RequestHandlerClass(request, client_address, self)
+            else:
+                handler.resume()
+        except Exception:
+            self.handle_error(request, client_address)
+            self.shutdown_request(request)
+            return
+        if handler.close_connection:
+            self.shutdown_request(request)
+        else:
+            self._park(request, client_address, handler)
+    
+    def _close(self, request, handler):
+        """Close a parked connection that will not be served again."""
+        if handler is not None:
+            handler.close_connection = True
+            try:
+                handler.finish()
+            except OSError:
+                pass
+        self.shutdown_request(request)
+    
+    def _watch_idle(self):
+        """Selector loop: hand ready connections to the pool and close expired ones."""
+        selector = selectors.DefaultSelector()
+        selector.register(self._wakeup_r, selectors.EVENT_READ)
+        while True:
+            with self._parked_lock:
+                parked, self._parked = self._parked, []
+                closing = self._closing
+            if closing:
+                break
+            deadline = time.monotonic() + KEEPALIVE_TIMEOUT
+            for request, client_address, handler in parked:
+                try:
+                    selector.register(request, selectors.EVENT_READ, (client_address, handler, deadline))
+                except (ValueError, OSError):
+                    # Closed by the client in the meantime
+                    self._close(request, handler)
+            
+            for key, _ in selector.select(timeout=1.0):
+                if key.data is None:
+                    try:
+                        self._wakeup_r.recv(4096)
+                    except BlockingIOError:
+                        pass
+                    continue
+                selector.unregister(key.fileobj)
+                client_address, handler, _ = key.data
+                self._pool.submit(self._process, key.fileobj, client_address, handler)
+            
+            now = time.monotonic()
+            for key in list(selector.get_map().values()):
+                if key.data is not None and key.data[2] <= now:
+                    selector.unregister(key.fileobj)
+                    self._close(key.fileobj, key.data[1])
+        
+        for key in list(selector.get_map().values()):
+            if key.data is not None:
+                self._close(key.fileobj, key.data[1])
+        selector.close()
+    
+    def server_close(self):
+        super().server_close()
+        with self._parked_lock:
+            self._closing = True
+            parked, self._parked = self._parked, []
+        for request, _, handler in parked:
+            self._close(request, handler)
+        try:
+            self._wakeup_w.send(b'\0')
+        except BlockingIOError:
+            pass
+        self._watcher.join()
+        self._wakeup_r.close()
+        self._wakeup_w.close()
+        self._pool.shutdown(wait=False)
 
 
 def run_http_server():
@@ -626,10 +1098,11 @@ def run_http_server():
         else:
             BASE_URL = f"http://{host}:{port}"
     
-    server = HTTPServer((host, port), MCPHTTPHandler)
+    server = MCPServer((host, port), MCPHTTPHandler)
     print(f"Office Word MCP Server running on http://{host}:{port}")
     print(f"Documents directory: {DOCUMENTS_DIR}")
     print(f"Base URL: {BASE_URL}")
+    print(f"Workers: {WORKERS}")
     print(f"MCP endpoint: http://{host}:{port}/mcp/stream")
     print(f"Documents endpoint: http://{host}:{port}/documents/")
     
@@ -3,19 +3,100 @@ Storage adapter for document persistence.
 Supports multiple backends: S3, Render Disk, and local filesystem.
 """
 
+import io
 import os
-from typing import Optional, BinaryIO
+import asyncio
+import time
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Optional, BinaryIO, Dict, List, Tuple, Union
 import tempfile
 import shutil
+from contextlib import contextmanager
+from word_document_server.utils.file_utils import fast_copy
+
+# Buffer size for streamed transfers
+_COPY_CHUNK = 1 << 20
+# Mode for stored documents, as open() would create them; mkstemp files start at 0600.
+# Read once at import, since umask can only be read by setting it
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+_FILE_MODE = 0o666 & ~_UMASK
+
+# Documents transferred at once by bulk_upload/bulk_download
+BULK_WORKERS = int(os.getenv('STORAGE_BULK_WORKERS', '10'))
+MB = 1024 * 1024
+# Pooled HTTPS connections to S3; covers the request workers plus bulk and multipart transfers
+S3_MAX_POOL = int(os.getenv('S3_MAX_POOL', '64'))
+# Most keys a single S3 DeleteObjects request accepts
+S3_DELETE_BATCH = 1000
+
+# Directory keeping an ETag-keyed copy of downloaded S3 documents, e.g. on a
+# Render Disk, so cold reads after a restart skip S3 (empty disables)
+S3_CACHE_DIR = os.getenv('S3_CACHE_DIR', '')
+S3_CACHE_MAX_BYTES = int(os.getenv('S3_CACHE_BYTES', str(512 * MB)))
+
+# Presigned URLs last an hour; a cached one is handed out for at most half that
+PRESIGN_EXPIRES = 3600
+PRESIGN_REFRESH = 1800
+
+
+@contextmanager
+def _replacing(dst: str):
+    """
+    Yield a temp path in dst's directory to write the new content to; once the
+    block completes it atomically replaces dst, and on error it is removed.
+    Readers of dst see the old or the new file, never a partial one.
+    """
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(dst) or '.', prefix='.', suffix='.tmp')
+    try:
+        if hasattr(os, 'fchmod'):
+            os.fchmod(fd, _FILE_MODE)
+        os.close(fd)
+        yield tmp
+        os.replace(tmp, dst)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def _replace_with_copy(src: str, dst: str) -> None:
+    """Copy src over dst like fast_copy, but via _replacing."""
+    try:
+        if os.path.samefile(src, dst):
+            raise shutil.SameFileError(f"{src!r} and {dst!r} are the same file")
+    except FileNotFoundError:
+        pass
+    with _replacing(dst) as tmp:
+        fast_copy(src, tmp)
+
+
+def _stat_signature(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size
 
 
 class StorageAdapter:
     """Abstract storage adapter for document persistence."""
     
     def __init__(self):
+        # Background bucket check started by _init_s3; see storage_type
+        self._s3_check: Optional[threading.Thread] = None
         # Default to 'disk' for Render persistent storage (no external setup needed)
         self.storage_type = os.getenv('STORAGE_TYPE', 'disk').lower()
         self.base_url = os.getenv('BASE_URL', '')
+        self._bulk_pool: Optional[ThreadPoolExecutor] = None
+        self._cache_dir: Optional[str] = None
+        # S3 key -> (ETag, local path, (mtime_ns, size)) of its last download,
+        # so an untouched local copy can be revalidated instead of fetched again
+        self._downloaded: Dict[str, Tuple[str, str, Tuple[int, int]]] = {}
         
         if self.storage_type == 's3':
             self._init_s3()
@@ -48,20 +129,71 @@ class StorageAdapter:
             return
         
         try:
-            self.s3_client = boto3.client(
-                's3',
+            from botocore.config import Config
+            # Threads share one client, so size its pool for them and keep connections alive
+            config = Config(
+                max_pool_connections=S3_MAX_POOL,
+                retries={'max_attempts': 10, 'mode': 'adaptive'},
+                tcp_keepalive=True
+            )
+            self._session = boto3.session.Session(
                 aws_access_key_id=self.s3_access_key,
                 aws_secret_access_key=self.s3_secret_key,
                 region_name=self.s3_region
             )
-            # Test connection
+            self.s3_client = self._session.client('s3', config=config)
+            # Presigning is purely local, but rebuilding the signer per call still adds up
+            self._public_url_prefix = f"https://{self.s3_bucket}.s3.{self.s3_region}.amazonaws.com/"
+            self._presign = functools.lru_cache(maxsize=4096)(self._make_presigned_url)
+            # One transfer config for every call; small documents go in a single PUT.
+            # Above the threshold each worker reads its own part from disk while
+            # the others send theirs, so disk reads already overlap the network
+            from boto3.s3.transfer import TransferConfig
+            self._transfer_cfg = TransferConfig(
+                multipart_threshold=8 * MB,
+                multipart_chunksize=16 * MB,
+                max_concurrency=10,
+                io_chunksize=MB,
+                max_io_queue=10000
+            )
+            if S3_CACHE_DIR:
+                try:
+                    os.makedirs(S3_CACHE_DIR, exist_ok=True)
+                    self._cache_dir = S3_CACHE_DIR
+                except OSError as e:
+                    print(f"Warning: S3 download cache disabled: {e}")
+            # Test the connection off the startup path; it also opens the first
+            # pooled connection, so the first real request skips the TLS handshake
+            self._s3_check = threading.Thread(target=self._verify_s3, name='storage_s3_check', daemon=True)
+            self._s3_check.start()
+        except Exception as e:
+            print(f"Warning: S3 initialization failed: {e}, falling back to local storage")
+            self.storage_type = 'local'
+            self._init_local()
+    
+    def _verify_s3(self):
+        """Check the bucket is reachable, falling back to local storage if not."""
+        try:
             self.s3_client.head_bucket(Bucket=self.s3_bucket)
             print(f"S3 storage initialized: bucket={self.s3_bucket}, region={self.s3_region}")
         except Exception as e:
             print(f"Warning: S3 initialization failed: {e}, falling back to local storage")
-            self.storage_type = 'local'
+            self._storage_type = 'local'
             self._init_local()
     
+    @property
+    def storage_type(self) -> str:
+        """Backend in use; waits for a pending S3 bucket check, which may still fall back to local."""
+        check = self._s3_check
+        if check is not None:
+            check.join()
+            self._s3_check = None
+        return self._storage_type
+    
+    @storage_type.setter
+    def storage_type(self, value: str):
+        self._storage_type = value
+    
     def _init_disk(self):
         """Initialize Render Disk storage."""
         # Render mounts persistent disks at /mnt/disk by default
@@ -69,6 +201,8 @@ class StorageAdapter:
         try:
             os.makedirs(disk_path, exist_ok=True)
             self.disk_path = disk_path
+            # Trailing separator included, so paths are built by concatenation
+            self._prefix = os.path.join(disk_path, '')
             print(f"Render Disk storage initialized: path={disk_path}")
         except PermissionError:
             # If /mnt/disk doesn't exist (no disk attached), fall back to local
@@ -82,16 +216,15 @@ class StorageAdapter:
         local_path = os.getenv('DOCUMENTS_DIR', './documents')
         os.makedirs(local_path, exist_ok=True)
         self.local_path = local_path
+        self._prefix = os.path.join(local_path, '')
         print(f"Local storage initialized: path={local_path}")
     
     def get_document_path(self, filename: str) -> str:
         """Get the full path for a document based on storage type."""
         if self.storage_type == 's3':
             return f"s3://{self.s3_bucket}/{filename}"
-        elif self.storage_type == 'disk':
-            return os.path.join(self.disk_path, filename)
         else:
-            return os.path.join(self.local_path, filename)
+            return self._prefix + filename
     
     def download_document(self, filename: str, local_path: Optional[str] = None) -> str:
         """
@@ -104,61 +237,283 @@ class StorageAdapter:
             
             try:
                 from botocore.exceptions import ClientError
-                self.s3_client.download_file(self.s3_bucket, filename, local_path)
+                previous = self._downloaded.pop(filename, None)
+                if previous is not None and previous[1] == local_path and _stat_signature(local_path) == previous[2]:
+                    try:
+                        etag = self._get_object_to(filename, local_path, IfNoneMatch=previous[0])
+                    except ClientError as e:
+                        if e.response['Error']['Code'] not in ('304', 'NotModified'):
+                            raise
+                        etag = previous[0]  # Unchanged; the local copy is current
+                elif self._cache_dir:
+                    etag = self._download_cached(filename, local_path)
+                else:
+                    etag = self._get_object_to(filename, local_path)
+                self._downloaded[filename] = (etag, local_path, _stat_signature(local_path))
                 return local_path
             except ClientError as e:
-                if e.response['Error']['Code'] == '404':
+                if e.response['Error']['Code'] in ('404', 'NoSuchKey'):
                     raise FileNotFoundError(f"Document {filename} not found in S3")
                 raise
         
         elif self.storage_type == 'disk':
-            source_path = os.path.join(self.disk_path, filename)
+            source_path = self._prefix + filename
             if local_path is None:
                 local_path = os.path.join(tempfile.gettempdir(), filename)
             
             if not os.path.exists(source_path):
                 raise FileNotFoundError(f"Document {filename} not found")
             
-            shutil.copy2(source_path, local_path)
+            fast_copy(source_path, local_path)
             return local_path
         
         else:  # local
-            file_path = os.path.join(self.local_path, filename)
+            file_path = self._prefix + filename
             if not os.path.exists(file_path):
                 raise FileNotFoundError(f"Document {filename} not found")
-            return file_path
+            if local_path is None:
+                return file_path
+            fast_copy(file_path, local_path)
+            return local_path
+    
+    def _get_object_to(self, filename: str, local_path: str, **conditions) -> str:
+        """GET an S3 document into local_path, passing any If* conditions; returns its ETag."""
+        response = self.s3_client.get_object(Bucket=self.s3_bucket, Key=filename, **conditions)
+        body = response['Body']
+        try:
+            with open(local_path, 'wb') as f:
+                shutil.copyfileobj(body, f, _COPY_CHUNK)
+        finally:
+            body.close()
+        return response['ETag']
+    
+    def _download_cached(self, filename: str, local_path: str) -> str:
+        """Download an S3 document through the local cache, keyed by its ETag; returns the ETag."""
+        etag = self.s3_client.head_object(Bucket=self.s3_bucket, Key=filename)['ETag']
+        cached = os.path.join(self._cache_dir, etag.strip('"') + '.docx')
+        try:
+            fast_copy(cached, local_path)
+            os.utime(cached)  # Mark as recently used
+            return etag
+        except FileNotFoundError:
+            pass
+        
+        # IfMatch makes S3 refuse the GET if the object changed since the HEAD,
+        # so the cache never files content under the wrong ETag
+        self._get_object_to(filename, local_path, IfMatch=etag)
+        try:
+            with _replacing(cached) as tmp:
+                fast_copy(local_path, tmp)
+            self._trim_cache()
+        except OSError as e:
+            print(f"Warning: could not cache {filename}: {e}")
+        return etag
+    
+    def _trim_cache(self) -> None:
+        """Evict least recently used cache files until it fits S3_CACHE_MAX_BYTES."""
+        entries = []
+        total = 0
+        with os.scandir(self._cache_dir) as it:
+            for entry in it:
+                if entry.name.endswith('.docx'):
+                    st = entry.stat()
+                    entries.append((st.st_mtime_ns, st.st_size, entry.path))
+                    total += st.st_size
+        if total <= S3_CACHE_MAX_BYTES:
+            return
+        entries.sort()
+        for _, size, path in entries:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            if total <= S3_CACHE_MAX_BYTES:
+                break
+    
+    def open_read_fd(self, filename: str) -> int:
+        """
+        Open a document for reading and return the raw file descriptor,
+        e.g. for socket.sendfile. The caller owns the descriptor and must close it.
+        S3 documents are downloaded to a temp file first, which is unlinked
+        once opened.
+        """
+        if self.storage_type == 's3':
+            path = self.download_document(filename)
+            fd = os.open(path, os.O_RDONLY)
+            os.unlink(path)
+        else:
+            fd = os.open(self._prefix + filename, os.O_RDONLY)
+        if hasattr(os, 'posix_fadvise'):
+            # Whole-file sequential read: widen readahead and start it now
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+        return fd
     
     def upload_document(self, local_path: str, filename: str) -> str:
         """
         Upload a document from local filesystem to storage.
         Returns the storage URL/path.
         """
+        return self.upload_document_with_etag(local_path, filename)[0]
+    
+    def upload_document_with_etag(self, local_path: str, filename: str) -> Tuple[str, Optional[str]]:
+        """
+        Upload a document like upload_document.
+        Returns the storage URL/path and the stored copy's ETag (as
+        get_document_etag reports it), or None where the upload doesn't tell.
+        """
         if self.storage_type == 's3':
             try:
                 from botocore.exceptions import ClientError
-                self.s3_client.upload_file(local_path, self.s3_bucket, filename)
+                etag = None
+                if os.path.getsize(local_path) < self._transfer_cfg.multipart_threshold:
+                    # A single PUT either way; calling it directly yields the ETag
+                    with open(local_path, 'rb') as f:
+                        etag = self.s3_client.put_object(Bucket=self.s3_bucket, Key=filename, Body=f)['ETag']
+                else:
+                    self.s3_client.upload_file(local_path, self.s3_bucket, filename, Config=self._transfer_cfg)
                 # Return public URL if bucket is public, otherwise return S3 path
                 if self.base_url:
-                    return f"{self.base_url}/documents/{filename}"
+                    return f"{self.base_url}/documents/{filename}", etag
                 else:
-                    return f"s3://{self.s3_bucket}/{filename}"
+                    return f"s3://{self.s3_bucket}/{filename}", etag
             except ClientError as e:
-                raise Exception(f"Failed to upload to S3: {str(e)}")
+                raise Exception(f"Failed to upload to S3: {str(e)}") from e
         
         elif self.storage_type == 'disk':
-            dest_path = os.path.join(self.disk_path, filename)
-            shutil.copy2(local_path, dest_path)
+            dest_path = self._prefix + filename
+            _replace_with_copy(local_path, dest_path)
+            etag = self.get_document_etag(filename)  # A local stat
             if self.base_url:
-                return f"{self.base_url}/documents/{filename}"
-            return dest_path
+                return f"{self.base_url}/documents/{filename}", etag
+            return dest_path, etag
         
         else:  # local
-            dest_path = os.path.join(self.local_path, filename)
-            shutil.copy2(local_path, dest_path)
+            dest_path = self._prefix + filename
+            _replace_with_copy(local_path, dest_path)
+            etag = self.get_document_etag(filename)
+            if self.base_url:
+                return f"{self.base_url}/documents/{filename}", etag
+            return dest_path, etag
+    
+    def download_stream(self, filename: str, fileobj: BinaryIO) -> BinaryIO:
+        """
+        Download a document from storage into a writable file-like object.
+        Returns the file object, rewound to the start.
+        """
+        if self.storage_type == 's3':
+            try:
+                from botocore.exceptions import ClientError
+                self.s3_client.download_fileobj(self.s3_bucket, filename, fileobj, Config=self._transfer_cfg)
+            except ClientError as e:
+                if e.response['Error']['Code'] == '404':
+                    raise FileNotFoundError(f"Document {filename} not found in S3")
+                raise
+        
+        else:  # disk or local
+            source_path = self._prefix + filename
+            if not os.path.exists(source_path):
+                raise FileNotFoundError(f"Document {filename} not found")
+            with open(source_path, 'rb') as f:
+                shutil.copyfileobj(f, fileobj, _COPY_CHUNK)
+        
+        fileobj.seek(0)
+        return fileobj
+    
+    def upload_stream(self, fileobj: BinaryIO, filename: str) -> str:
+        """
+        Upload a document to storage from a readable file-like object.
+        Returns the storage URL/path.
+        """
+        if self.storage_type == 's3':
+            try:
+                from botocore.exceptions import ClientError
+                self.s3_client.upload_fileobj(fileobj, self.s3_bucket, filename, Config=self._transfer_cfg)
+                if self.base_url:
+                    return f"{self.base_url}/documents/{filename}"
+                else:
+                    return f"s3://{self.s3_bucket}/{filename}"
+            except ClientError as e:
+                raise Exception(f"Failed to upload to S3: {str(e)}") from e
+        
+        else:  # disk or local
+            dest_path = self._prefix + filename
+            with _replacing(dest_path) as tmp, open(tmp, 'wb') as f:
+                shutil.copyfileobj(fileobj, f, _COPY_CHUNK)
             if self.base_url:
                 return f"{self.base_url}/documents/{filename}"
             return dest_path
     
+    def upload_bytes(self, data: Union[bytes, bytearray, memoryview, BinaryIO], filename: str) -> str:
+        """
+        Upload a document held in memory, without writing it to a temp file first.
+        Accepts raw bytes or a readable file-like object.
+        Returns the storage URL/path.
+        """
+        if isinstance(data, (bytes, bytearray, memoryview)):
+            data = io.BytesIO(data)
+        return self.upload_stream(data, filename)
+    
+    def _get_bulk_pool(self) -> ThreadPoolExecutor:
+        """Create the shared pool for bulk transfers on first use."""
+        if self._bulk_pool is None:
+            self._bulk_pool = ThreadPoolExecutor(max_workers=BULK_WORKERS, thread_name_prefix='storage_bulk')
+        return self._bulk_pool
+    
+    def bulk_upload(self, items: List[Tuple[str, str]]) -> List[Dict[str, str]]:
+        """
+        Upload several documents concurrently.
+        Takes (local_path, filename) pairs and returns one dict per item, in
+        order, holding either the storage 'url' or the 'error' it failed with.
+        """
+        pool = self._get_bulk_pool()
+        futures = {pool.submit(self.upload_document, local, name): i for i, (local, name) in enumerate(items)}
+        results: List[Dict[str, str]] = [{} for _ in items]
+        for future in as_completed(futures):
+            i = futures[future]
+            try:
+                results[i] = {'filename': items[i][1], 'url': future.result()}
+            except Exception as e:
+                results[i] = {'filename': items[i][1], 'error': str(e)}
+        return results
+    
+    def bulk_download(self, filenames: List[str], local_dir: Optional[str] = None) -> List[Dict[str, str]]:
+        """
+        Download several documents concurrently.
+        Returns one dict per filename, in order, holding either the local
+        'path' or the 'error' it failed with.
+        """
+        pool = self._get_bulk_pool()
+        futures = {
+            pool.submit(self.download_document, name, os.path.join(local_dir, name) if local_dir else None): i
+            for i, name in enumerate(filenames)
+        }
+        results: List[Dict[str, str]] = [{} for _ in filenames]
+        for future in as_completed(futures):
+            i = futures[future]
+            try:
+                results[i] = {'filename': filenames[i], 'path': future.result()}
+            except Exception as e:
+                results[i] = {'filename': filenames[i], 'error': str(e)}
+        return results
+    
+    # Awaitable transfers for async callers. boto3 blocks for the whole
+    # transfer, so each runs in a worker thread to keep the event loop free;
+    # gathering several of them overlaps their round trips.
+    
+    async def download_document_async(self, filename: str, local_path: Optional[str] = None) -> str:
+        """Async variant of download_document."""
+        return await asyncio.to_thread(self.download_document, filename, local_path)
+    
+    async def upload_document_async(self, local_path: str, filename: str) -> str:
+        """Async variant of upload_document."""
+        return await asyncio.to_thread(self.upload_document, local_path, filename)
+    
+    async def upload_bytes_async(self, data: Union[bytes, bytearray, memoryview, BinaryIO], filename: str) -> str:
+        """Async variant of upload_bytes."""
+        return await asyncio.to_thread(self.upload_bytes, data, filename)
+    
     def document_exists(self, filename: str) -> bool:
         """Check if a document exists in storage."""
         if self.storage_type == 's3':
@@ -171,11 +526,30 @@ class StorageAdapter:
                     return False
                 raise
         
-        elif self.storage_type == 'disk':
-            return os.path.exists(os.path.join(self.disk_path, filename))
+        else:  # disk or local
+            return os.path.exists(self._prefix + filename)
+    
+    def get_document_etag(self, filename: str) -> Optional[str]:
+        """
+        Get a version tag for a stored document, or None if it doesn't exist.
+        The tag changes whenever the stored content changes.
+        """
+        if self.storage_type == 's3':
+            try:
+                from botocore.exceptions import ClientError
+                response = self.s3_client.head_object(Bucket=self.s3_bucket, Key=filename)
+                return response['ETag']
+            except ClientError as e:
+                if e.response['Error']['Code'] == '404':
+                    return None
+                raise
         
-        else:  # local
-            return os.path.exists(os.path.join(self.local_path, filename))
+        else:  # disk or local
+            try:
+                st = os.stat(self._prefix + filename)
+            except FileNotFoundError:
+                return None
+            return f"{st.st_mtime_ns:x}-{st.st_size:x}"
     
     def delete_document(self, filename: str) -> bool:
         """Delete a document from storage."""
@@ -185,43 +559,73 @@ class StorageAdapter:
                 self.s3_client.delete_object(Bucket=self.s3_bucket, Key=filename)
                 return True
             except ClientError as e:
-                raise Exception(f"Failed to delete from S3: {str(e)}")
+                raise Exception(f"Failed to delete from S3: {str(e)}") from e
         
-        elif self.storage_type == 'disk':
-            file_path = os.path.join(self.disk_path, filename)
-            if os.path.exists(file_path):
-                os.remove(file_path)
+        else:  # disk or local
+            try:
+                os.remove(self._prefix + filename)
                 return True
-            return False
+            except FileNotFoundError:
+                return False
+    
+    def bulk_delete(self, filenames: List[str]) -> Dict[str, bool]:
+        """
+        Delete several documents at once.
+        Returns whether each filename was deleted. Failed deletes map to False,
+        as do missing files on disk; S3 reports absent keys as deleted.
+        """
+        if self.storage_type == 's3':
+            from botocore.exceptions import ClientError
+            results = {name: False for name in filenames}
+            for i in range(0, len(filenames), S3_DELETE_BATCH):
+                chunk = filenames[i:i + S3_DELETE_BATCH]
+                try:
+                    response = self.s3_client.delete_objects(
+                        Bucket=self.s3_bucket,
+                        Delete={'Objects': [{'Key': key} for key in chunk]}
+                    )
+                except ClientError as e:
+                    raise Exception(f"Failed to delete from S3: {str(e)}") from e
+                for deleted in response.get('Deleted', []):
+                    results[deleted['Key']] = True
+            return results
         
-        else:  # local
-            file_path = os.path.join(self.local_path, filename)
-            if os.path.exists(file_path):
-                os.remove(file_path)
-                return True
-            return False
+        # Disk and local: unlink concurrently; delete_document reports missing files
+        pool = self._get_bulk_pool()
+        futures = {name: pool.submit(self.delete_document, name) for name in filenames}
+        results = {}
+        for name, future in futures.items():
+            try:
+                results[name] = future.result()
+            except OSError:
+                results[name] = False
+        return results
     
     def get_document_url(self, filename: str) -> str:
         """Get the public URL for a document."""
         if self.storage_type == 's3':
-            # Generate presigned URL (valid for 1 hour) or use public URL
+            # Generate presigned URL (valid for 1 hour) or use public URL; the
+            # time bucket in the key makes cached URLs roll over before expiring
             try:
-                url = self.s3_client.generate_presigned_url(
-                    'get_object',
-                    Params={'Bucket': self.s3_bucket, 'Key': filename},
-                    ExpiresIn=3600
-                )
-                return url
-            except:
+                return self._presign(filename, int(time.time() // PRESIGN_REFRESH))
+            except Exception:
                 # Fallback to public URL if bucket is public
-                return f"https://{self.s3_bucket}.s3.{self.s3_region}.amazonaws.com/{filename}"
+                return self._public_url_prefix + filename
         
         elif self.storage_type == 'disk' or self.storage_type == 'local':
             if self.base_url:
                 return f"{self.base_url}/documents/{filename}"
-            return self.get_document_path(filename)
+            return self._prefix + filename
         
         return filename
+    
+    def _make_presigned_url(self, filename: str, time_bucket: int) -> str:
+        """Presign a GET for filename; time_bucket only keys the cache."""
+        return self.s3_client.generate_presigned_url(
+            'get_object',
+            Params={'Bucket': self.s3_bucket, 'Key': filename},
+            ExpiresIn=PRESIGN_EXPIRES
+        )
 
 
 # Global storage adapter instance
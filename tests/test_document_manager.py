@@ -0,0 +1,69 @@
+from pathlib import Path
+
+import pytest
+
+import document_manager
+from document_manager import DocumentManager
+from storage_adapter import StorageAdapter
+
+
+@pytest.fixture
+def manager(tmp_path: Path, monkeypatch):
+    """A DocumentManager on local storage in tmp_path, with short upload timers."""
+    monkeypatch.setenv("STORAGE_TYPE", "local")
+    monkeypatch.setenv("DOCUMENTS_DIR", str(tmp_path / "stored"))
+    monkeypatch.setattr(document_manager, "UPLOAD_DEBOUNCE_MS", 50)
+    # Long enough that retries only happen when the test flushes them
+    monkeypatch.setattr(document_manager, "UPLOAD_RETRY_DELAY", 3600.0)
+    # A storage adapter of its own, leaving the process-wide one alone
+    monkeypatch.setattr(document_manager, "get_storage_adapter", StorageAdapter)
+    mgr = DocumentManager()
+    yield mgr
+    for timer in list(mgr._timers.values()):
+        timer.cancel()
+
+
+def _edit(mgr: DocumentManager, filename: str, content: bytes) -> str:
+    local_path = mgr.get_local_path(filename, create_if_missing=True)
+    Path(local_path).write_bytes(content)
+    mgr.release_local_path(local_path, filename, modified=True)
+    return local_path
+
+
+def test_failed_upload_keeps_edits_and_retries(manager, monkeypatch):
+    """Edits whose upload failed stay in the temp file, are edited further, and are uploaded later."""
+    stored = Path(manager.storage.local_path) / "doc.docx"
+    _edit(manager, "doc.docx", b"v1")
+    manager.flush_uploads()
+    assert stored.read_bytes() == b"v1"
+
+    upload = manager.storage.upload_document_with_etag
+
+    def fail(local_path, filename):
+        raise PermissionError("storage refused the upload")
+
+    monkeypatch.setattr(manager.storage, "upload_document_with_etag", fail)
+    local_path = _edit(manager, "doc.docx", b"v2")
+    with pytest.raises(PermissionError):
+        manager.flush_uploads()
+
+    # Not deleted, still the current copy, and a retry is scheduled on a daemon timer
+    assert Path(local_path).read_bytes() == b"v2"
+    assert local_path in manager._dirty
+    timer, = manager._timers.values()
+    assert timer.daemon
+    manager.cleanup_temp("doc.docx")
+    assert Path(local_path).exists()
+
+    # The next edit starts from the unsaved copy rather than the stored v1
+    again = manager.get_local_path("doc.docx")
+    assert again == local_path and Path(again).read_bytes() == b"v2"
+    Path(again).write_bytes(b"v2+v3")
+    manager.release_local_path(again, "doc.docx", modified=True)
+    with manager.open_document("doc.docx") as f:
+        assert f.read() == b"v2+v3"
+
+    monkeypatch.setattr(manager.storage, "upload_document_with_etag", upload)
+    manager.flush_uploads()
+    assert stored.read_bytes() == b"v2+v3"
+    assert local_path not in manager._dirty
@@ -0,0 +1,100 @@
+from docx import Document
+from docx.oxml import parse_xml
+from docx.oxml.ns import nsdecls
+from docx.shared import Pt
+
+from word_document_server.utils.header_utils import apply_header_placeholders
+
+
+def _header_paragraph():
+    """Returns a new document and the (empty) first paragraph of its header."""
+    doc = Document()
+    return doc, doc.sections[0].header.paragraphs[0]
+
+
+def test_placeholder_in_single_run_keeps_run_formatting():
+    """A placeholder held by one run is replaced inside that run; every run keeps its formatting."""
+    doc, paragraph = _header_paragraph()
+    prefix = paragraph.add_run("Report: ")
+    prefix.bold = True
+    placeholder = paragraph.add_run("{Document Title}")
+    placeholder.italic = True
+    placeholder.font.size = Pt(14)
+
+    assert apply_header_placeholders(doc, "Quarterly Results", None)
+
+    runs = paragraph.runs
+    assert [r.text for r in runs] == ["Report: ", "Quarterly Results"]
+    assert runs[0].bold
+    assert runs[1].italic and runs[1].font.size == Pt(14)
+    # Not restyled to the Calibri 11pt used when a paragraph has to be rebuilt
+    assert runs[1].font.name is None and not runs[1].bold
+
+
+def test_placeholder_split_across_runs_is_rebuilt():
+    """A placeholder spread over several runs is rebuilt as one run with the first run's formatting."""
+    doc, paragraph = _header_paragraph()
+    first = paragraph.add_run("{Document ")
+    first.font.size = Pt(16)
+    first.font.name = "Arial"
+    paragraph.add_run("Subtitle} draft")
+
+    assert apply_header_placeholders(doc, None, "Annual Plan")
+
+    run, = paragraph.runs
+    assert run.text == "Annual Plan draft"
+    assert run.font.size == Pt(16) and run.font.name == "Arial"
+
+
+def test_split_placeholder_without_size_gets_default_font():
+    """A rebuilt paragraph whose first run has no size falls back to Calibri 11pt, bold for titles."""
+    doc, paragraph = _header_paragraph()
+    paragraph.add_run("{Document")
+    paragraph.add_run(" Title}")
+
+    assert apply_header_placeholders(doc, "Title Text", None)
+
+    run, = paragraph.runs
+    assert run.text == "Title Text"
+    assert run.font.name == "Calibri" and run.font.size == Pt(11) and run.bold
+
+
+def test_placeholder_inside_hyperlink():
+    """A placeholder inside a hyperlink is replaced; the paragraph is rebuilt as plain text."""
+    doc, paragraph = _header_paragraph()
+    paragraph.add_run("See ")
+    paragraph._p.append(parse_xml(
+        f'<w:hyperlink {nsdecls("w")} w:anchor="top"><w:r><w:t>{{Document Title}}</w:t></w:r></w:hyperlink>'
+    ))
+
+    assert apply_header_placeholders(doc, "Linked Title", None)
+
+    assert paragraph.text == "See Linked Title"
+    assert "{Document Title}" not in paragraph._p.xml
+
+
+def test_both_placeholders_in_one_run():
+    """Title and subtitle in the same run are both replaced in that run, which keeps its formatting."""
+    doc, paragraph = _header_paragraph()
+    run = paragraph.add_run("{Document Title} - {Document Subtitle}")
+    run.italic = True
+
+    assert apply_header_placeholders(doc, "Main", "Secondary")
+
+    run, = paragraph.runs
+    assert run.text == "Main - Secondary"
+    assert run.italic
+
+
+def test_only_requested_placeholders_are_replaced():
+    """A placeholder whose value is None is left alone, and a header without placeholders is unchanged."""
+    doc, paragraph = _header_paragraph()
+    paragraph.add_run("{Document Title} / {Document Subtitle}")
+
+    assert apply_header_placeholders(doc, None, "Sub")
+    assert paragraph.text == "{Document Title} / Sub"
+
+    plain_doc, plain = _header_paragraph()
+    plain.add_run("No placeholders {here}")
+    assert not apply_header_placeholders(plain_doc, "T", "S")
+    assert plain.text == "No placeholders {here}"
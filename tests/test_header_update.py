@@ -0,0 +1,37 @@
+import asyncio
+from pathlib import Path
+
+from docx import Document
+
+from word_document_server.tools import document_formatting_tools
+from word_document_server.tools.document_formatting_tools import get_header_info, update_header_title_subtitle
+
+
+def _header_paragraphs(path: Path):
+    return Document(str(path)).sections[0].header.paragraphs
+
+
+def test_repeated_header_updates(tmp_path: Path):
+    """Updating the title/subtitle twice swaps the text without leaving empty lines behind."""
+    path = tmp_path / "header.docx"
+    Document().save(path)
+
+    asyncio.run(update_header_title_subtitle(str(path), title="First Title", subtitle="First Subtitle"))
+    assert asyncio.run(get_header_info(str(path))) == "Header content:\nLine 1: First Title\nLine 2: First Subtitle"
+
+    asyncio.run(update_header_title_subtitle(str(path), title="Second Title", subtitle="Second Subtitle"))
+    assert asyncio.run(get_header_info(str(path))) == "Header content:\nLine 1: Second Title\nLine 2: Second Subtitle"
+
+    # Same answer when the header is read from the file rather than the cached document
+    document_formatting_tools._forget(str(path))
+    assert asyncio.run(get_header_info(str(path))) == "Header content:\nLine 1: Second Title\nLine 2: Second Subtitle"
+
+    paragraphs = _header_paragraphs(path)
+    assert [p.text for p in paragraphs] == ["Second Title", "Second Subtitle"]
+    # Still laid out as the first update wrote it: centered Calibri 11pt, bold title
+    assert all(p.alignment == 1 for p in paragraphs)
+    title_run, = paragraphs[0].runs
+    subtitle_run, = paragraphs[1].runs
+    assert title_run.bold and not subtitle_run.bold
+    assert title_run.font.name == subtitle_run.font.name == "Calibri"
+    assert title_run.font.size.pt == subtitle_run.font.size.pt == 11
@@ -0,0 +1,231 @@
+import http.client
+import json
+import socket
+import threading
+
+import pytest
+
+
+@pytest.fixture(scope="module")
+def server(tmp_path_factory):
+    """Runs the HTTP server on a free port, storing documents in a temporary directory."""
+    documents = tmp_path_factory.mktemp("documents")
+    patch = pytest.MonkeyPatch()
+    patch.setenv("STORAGE_TYPE", "local")
+    patch.setenv("DOCUMENTS_DIR", str(documents))
+    patch.delenv("DISK_PATH", raising=False)
+    patch.delenv("BASE_URL", raising=False)
+
+    # Imported here: the module sets up storage from the environment on import
+    import http_server
+
+    srv = http_server.MCPServer(("127.0.0.1", 0), http_server.MCPHTTPHandler)
+    thread = threading.Thread(target=srv.serve_forever, daemon=True)
+    thread.start()
+    yield http_server, srv.server_address[1]
+    srv.shutdown()
+    srv.server_close()
+    patch.undo()
+
+
+def _post(port, payload):
+    """POSTs a JSON-RPC payload to /mcp/stream and returns (status, decoded body)."""
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    try:
+        conn.request("POST", "/mcp/stream", body=json.dumps(payload), headers={"Content-Type": "application/json"})
+        response = conn.getresponse()
+        return response.status, json.loads(response.read())
+    finally:
+        conn.close()
+
+
+def _call(request_id, name, **arguments):
+    return {"jsonrpc": "2.0", "id": request_id, "method": "tools/call", "params": {"name": name, "arguments": arguments}}
+
+
+def test_mixed_batch(server):
+    """A batch of different methods answers each one; later calls see earlier edits."""
+    _, port = server
+    status, responses = _post(port, [
+        {"jsonrpc": "2.0", "id": 1, "method": "initialize", "params": {}},
+        _call(2, "create_document", filename="batch_mixed"),
+        _call(3, "add_paragraph", filename="batch_mixed", text="hello from a batch"),
+        _call(4, "get_document_text", filename="batch_mixed"),
+        {"jsonrpc": "2.0", "id": 5, "method": "tools/list"},
+        {"jsonrpc": "2.0", "id": 6, "method": "no/such/method"},
+    ])
+
+    assert status == 200
+    assert isinstance(responses, list)
+    assert [r["id"] for r in responses] == [1, 2, 3, 4, 5, 6]
+    assert responses[0]["result"]["serverInfo"]["name"] == "office-word-mcp-server"
+    assert "hello from a batch" in responses[3]["result"]["content"][0]["text"]
+    assert responses[4]["result"]["tools"]
+    assert responses[5]["error"]["code"] == -32601
+
+
+def test_batch_with_invalid_item(server):
+    """A non-object entry gets its own Invalid Request error without failing the rest."""
+    _, port = server
+    status, responses = _post(port, [
+        42,
+        {"jsonrpc": "2.0", "id": "list", "method": "tools/list"},
+    ])
+
+    assert status == 200
+    assert len(responses) == 2
+    assert responses[0] == {"jsonrpc": "2.0", "id": None, "error": {"code": -32600, "message": "Invalid Request"}}
+    assert responses[1]["id"] == "list"
+    assert "result" in responses[1]
+
+
+def test_empty_batch(server):
+    """An empty batch is a single Invalid Request error, not an empty array."""
+    _, port = server
+    status, response = _post(port, [])
+
+    assert status == 200
+    assert isinstance(response, dict)
+    assert response["id"] is None
+    assert response["error"]["code"] == -32600
+
+
+def test_batch_response_order(server):
+    """Responses come back in request order, whatever their ids."""
+    _, port = server
+    ids = ["c", 7, "a", None, "b"]
+    status, responses = _post(port, [{"jsonrpc": "2.0", "id": i, "method": "initialize", "params": {}} for i in ids])
+
+    assert status == 200
+    assert [r["id"] for r in responses] == ids
+
+
+def _read_to_eof(port, request: bytes) -> bytes:
+    """Sends a raw request and returns everything the server sends until it closes the connection."""
+    with socket.create_connection(("127.0.0.1", port), timeout=10) as sock:
+        sock.sendall(request)
+        data = b""
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                return data
+            data += chunk
+
+
+def _send_headers_only(port, path, content_length):
+    """Sends a POST announcing content_length bytes but no body; returns everything the server sends back."""
+    # Reading until EOF only finishes if the server answers without waiting
+    # for the body and then closes the connection; otherwise this times out
+    return _read_to_eof(port, (
+        f"POST {path} HTTP/1.1\r\nHost: localhost\r\n"
+        f"Content-Type: application/octet-stream\r\nContent-Length: {content_length}\r\n\r\n"
+    ).encode())
+
+
+@pytest.mark.parametrize("path, limit", [("/mcp/stream", "MAX_JSON_BODY"), ("/upload-template", "MAX_UPLOAD")])
+def test_oversized_body_rejected_unread(server, path, limit):
+    """An oversized Content-Length gets 413 and the connection is closed without reading the body."""
+    http_server, port = server
+    response = _send_headers_only(port, path, getattr(http_server, limit) + 1)
+
+    status_line = response.split(b"\r\n", 1)[0]
+    assert status_line.startswith(b"HTTP/1.") and b" 413 " in status_line
+    assert b"connection: close" in response.lower()
+
+
+def test_idle_keepalive_connections_do_not_hold_workers(server):
+    """With as many idle keep-alive connections as workers, new requests are still answered."""
+    http_server, port = server
+    idle = []
+    try:
+        for i in range(http_server.WORKERS):
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+            if i % 2:
+                # Served one request and kept open
+                conn.request("GET", "/health")
+                response = conn.getresponse()
+                response.read()
+                assert response.status == 200
+            else:
+                # Connected but has not sent anything yet
+                conn.connect()
+            idle.append(conn)
+
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+        try:
+            conn.request("GET", "/health")
+            response = conn.getresponse()
+            assert response.status == 200
+            assert json.loads(response.read()) == {"status": "ok"}
+        finally:
+            conn.close()
+
+        # A kept-alive connection is served again on its next request
+        reused = idle[1]
+        reused.request("GET", "/health")
+        assert reused.getresponse().status == 200
+    finally:
+        for conn in idle:
+            conn.close()
+
+
+def test_document_locks_not_kept_for_requested_names(server):
+    """Looking up missing documents leaves no per-name lock behind."""
+    http_server, port = server
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    try:
+        for i in range(20):
+            conn.request("GET", f"/documents/missing-{i}.docx")
+            response = conn.getresponse()
+            response.read()
+            assert response.status == 404
+    finally:
+        conn.close()
+
+    assert not any(name.startswith("missing-") for name in http_server.DOC_MANAGER._doc_locks)
+
+
+def test_tool_messages_name_documents(server):
+    """Tool messages mention the document names, not the temp files the tools worked on."""
+    http_server, port = server
+    _, responses = _post(port, [
+        _call(1, "create_document", filename="named_doc"),
+        _call(2, "add_paragraph", filename="named_doc", text="hello"),
+        _call(3, "copy_document", source_filename="named_doc"),
+    ])
+
+    texts = [r["result"]["content"][0]["text"] for r in responses]
+    assert all(http_server.DOC_MANAGER.temp_dir not in text for text in texts)
+    assert "named_doc.docx" in texts[1]
+    assert "named_doc_copy.docx" in texts[2]
+
+
+@pytest.mark.parametrize("path", ["/health", "/mcp/tools"])
+@pytest.mark.parametrize("request_line, headers", [
+    ("HTTP/1.0", ""),
+    ("HTTP/1.1", "Host: localhost\r\nConnection: close\r\n"),
+])
+def test_static_responses_announce_close(server, path, request_line, headers):
+    """Prebuilt responses say "Connection: close" when the server is about to close the connection."""
+    _, port = server
+    response = _read_to_eof(port, f"GET {path} {request_line}\r\n{headers}\r\n".encode())
+
+    head, body = response.split(b"\r\n\r\n", 1)
+    assert b" 200 " in head.split(b"\r\n", 1)[0]
+    assert b"\r\nConnection: close" in head
+    assert json.loads(body)
+
+
+def test_static_responses_keep_alive(server):
+    """On an HTTP/1.1 connection the prebuilt responses keep the connection open."""
+    _, port = server
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    try:
+        for path in ("/health", "/mcp/tools", "/health"):
+            conn.request("GET", path)
+            response = conn.getresponse()
+            response.read()
+            assert response.status == 200
+            assert response.getheader("Connection") == "keep-alive"
+    finally:
+        conn.close()
@@ -0,0 +1,69 @@
+import asyncio
+from pathlib import Path
+
+from docx import Document
+from docx.oxml.ns import qn
+
+from word_document_server.tools.document_tools import merge_documents
+
+
+def _make_source(path: Path, text: str, with_table: bool = False) -> str:
+    """Saves a document holding one line of text followed by two empty paragraphs (and optionally a table)."""
+    doc = Document()
+    doc.add_paragraph(text)
+    doc.add_paragraph("")
+    doc.add_paragraph("")
+    if with_table:
+        doc.add_table(rows=1, cols=1).cell(0, 0).text = f"{text} cell"
+    doc.save(path)
+    return str(path)
+
+
+def _merge(tmp_path: Path, sources, add_page_breaks: bool = True):
+    target = tmp_path / "merged.docx"
+    result = asyncio.run(merge_documents(str(target), sources, add_page_breaks))
+    assert result.startswith("Successfully merged"), result
+    return Document(str(target))
+
+
+def _is_page_break(paragraph) -> bool:
+    return any(br.get(qn("w:type")) == "page" for br in paragraph._p.iter(qn("w:br")))
+
+
+def _assert_sectpr_last(doc):
+    assert doc.element.body[-1].tag == qn("w:sectPr")
+
+
+def test_merge_drops_trailing_empty_paragraphs_before_page_break(tmp_path: Path):
+    """Empty paragraphs ending a source are dropped when a page break follows; the last source keeps them."""
+    sources = [_make_source(tmp_path / f"source{i}.docx", f"part {i}") for i in range(2)]
+
+    merged = _merge(tmp_path, sources)
+
+    paragraphs = merged.paragraphs
+    assert len(paragraphs) == 5
+    assert [p.text for p in paragraphs] == ["part 0", "", "part 1", "", ""]
+    assert _is_page_break(paragraphs[1])
+    _assert_sectpr_last(merged)
+
+
+def test_merge_keeps_empty_paragraphs_before_tables(tmp_path: Path):
+    """Sources with tables keep their empty paragraphs, since the tables are appended after them."""
+    sources = [_make_source(tmp_path / f"source{i}.docx", f"part {i}", with_table=True) for i in range(2)]
+
+    merged = _merge(tmp_path, sources)
+
+    assert [p.text for p in merged.paragraphs] == ["part 0", "", "", "", "part 1", "", ""]
+    assert [t.cell(0, 0).text for t in merged.tables] == ["part 0 cell", "part 1 cell"]
+    _assert_sectpr_last(merged)
+
+
+def test_merge_without_page_breaks_keeps_every_paragraph(tmp_path: Path):
+    """Without page breaks nothing is trimmed."""
+    sources = [_make_source(tmp_path / f"source{i}.docx", f"part {i}") for i in range(2)]
+
+    merged = _merge(tmp_path, sources, add_page_breaks=False)
+
+    assert len(merged.paragraphs) == 6
+    assert not any(_is_page_break(p) for p in merged.paragraphs)
+    _assert_sectpr_last(merged)
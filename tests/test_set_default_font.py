@@ -0,0 +1,68 @@
+import asyncio
+from pathlib import Path
+
+from docx import Document
+from docx.oxml.ns import qn
+from docx.shared import Pt
+
+from word_document_server.tools.document_formatting_tools import set_default_font
+
+
+def _set_font(path: Path):
+    result = asyncio.run(set_default_font(str(path), font_name="Arial", font_size=14))
+    assert result.startswith("Default font set"), result
+    return Document(str(path))
+
+
+def _has_font(run) -> bool:
+    return run.font.name == "Arial" and run.font.size == Pt(14)
+
+
+def test_unstyled_and_normal_paragraphs_get_the_font(tmp_path: Path):
+    """With Normal as the default style, unstyled and Normal paragraphs are updated; headings are not."""
+    path = tmp_path / "normal.docx"
+    doc = Document()
+    doc.add_paragraph("unstyled")
+    doc.add_paragraph("explicit", style="Normal")
+    doc.add_heading("heading", level=1)
+    # python-docx leaves the default style implicit
+    assert doc.paragraphs[0]._p.pPr is None
+    doc.save(path)
+
+    unstyled, explicit, heading = _set_font(path).paragraphs
+
+    assert _has_font(unstyled.runs[0])
+    assert _has_font(explicit.runs[0])
+    assert not _has_font(heading.runs[0])
+
+
+def test_unstyled_paragraphs_skipped_when_default_style_is_not_normal(tmp_path: Path):
+    """Paragraphs using a non-Normal default style keep their fonts; explicit Normal ones still change."""
+    path = tmp_path / "body_default.docx"
+    doc = Document()
+    doc.styles["Normal"].element.attrib.pop(qn("w:default"))
+    doc.styles["Body Text"].element.set(qn("w:default"), "1")
+    doc.add_paragraph("unstyled")
+    doc.add_paragraph("explicit", style="Normal")
+    doc.save(path)
+
+    unstyled, explicit = _set_font(path).paragraphs
+
+    assert unstyled.style.name == "Body Text"
+    assert not _has_font(unstyled.runs[0])
+    assert _has_font(explicit.runs[0])
+
+
+def test_unstyled_paragraphs_skipped_without_default_style(tmp_path: Path):
+    """Without any default paragraph style, unstyled paragraphs are not taken for Normal ones."""
+    path = tmp_path / "no_default.docx"
+    doc = Document()
+    doc.styles["Normal"].element.attrib.pop(qn("w:default"))
+    doc.add_paragraph("unstyled")
+    doc.add_paragraph("explicit", style="Normal")
+    doc.save(path)
+
+    unstyled, explicit = _set_font(path).paragraphs
+
+    assert not _has_font(unstyled.runs[0])
+    assert _has_font(explicit.runs[0])
@@ -3,25 +3,149 @@ Document-level formatting tools for Word Document Server.
 Handles default fonts, headers, footers, and document-wide settings.
 """
 import os
-from typing import Optional
+import asyncio
+import posixpath
+import threading
+import weakref
+import zipfile
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from copy import deepcopy
+from typing import Optional, Tuple
 from docx import Document
 from docx.shared import Pt
 from docx.enum.style import WD_STYLE_TYPE
+from docx.oxml.ns import nsdecls, nsmap, qn
+from docx.oxml.parser import parse_xml
+from lxml import etree
 
 from word_document_server.utils.file_utils import check_file_writeable, ensure_docx_extension
 
+# Runs of top-level Normal-styled paragraphs that lack a font name or size.
+# $ids is '|'-delimited paragraph style ids and contains '||' when paragraphs
+# without a pStyle (i.e. using the default style) should be included.
+_NORMAL_RUNS_XPATH = etree.XPath(
+    "./w:p[contains($ids, concat('|', string(w:pPr/w:pStyle/@w:val), '|'))]"
+    "/w:r[not(w:rPr/w:rFonts/@w:ascii) or not(w:rPr/w:sz/@w:val)]",
+    namespaces={'w': nsmap['w']}
+)
 
-async def set_default_font(filename: str, font_name: str = "Calibri", font_size: int = 11, apply_to_existing: bool = True) -> str:
-    """
-    Set the default font for the entire document.
-    This affects the Normal style and all paragraphs that use it.
-    
-    Args:
-        filename: Path to the Word document
-        font_name: Font family name (default: Calibri)
-        font_size: Font size in points (default: 11)
-        apply_to_existing: If True, apply font to existing paragraphs (default: True)
-    """
+# Top-level paragraphs of a header, and the runs of a paragraph in text order
+# (including those inside hyperlinks, as python-docx's Paragraph.text does)
+_PARAGRAPHS_XPATH = etree.XPath("./w:p", namespaces={'w': nsmap['w']})
+_PARAGRAPH_RUNS_XPATH = etree.XPath("./w:r | ./w:hyperlink/w:r", namespaces={'w': nsmap['w']})
+
+_OFFICE_DOCUMENT_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"
+_SECTPR_PARENTS = frozenset({qn('w:pPr'), qn('w:body')})
+
+# Font of the header title/subtitle runs written by update_header_title_subtitle
+_HEADER_FONT_NAME = "Calibri"
+_HEADER_FONT_SIZE = Pt(11)
+
+# Header title run and subtitle paragraph as update_header_title_subtitle
+# writes them (centered Calibri 11pt, bold title), copied for each use
+_HEADER_TITLE_RUN = parse_xml(
+    f'<w:r {nsdecls("w")}><w:rPr><w:rFonts w:ascii="Calibri" w:hAnsi="Calibri"/><w:b/>'
+    '<w:sz w:val="22"/></w:rPr></w:r>'
+)
+_HEADER_SUBTITLE_PARAGRAPH = parse_xml(
+    f'<w:p {nsdecls("w")}><w:pPr><w:jc w:val="center"/></w:pPr><w:r><w:rPr>'
+    '<w:rFonts w:ascii="Calibri" w:hAnsi="Calibri"/><w:sz w:val="22"/></w:rPr></w:r></w:p>'
+)
+
+# Parsed documents by absolute path, reused while the file on disk is unchanged
+_DOC_CACHE_MAX = 8
+_doc_cache: "OrderedDict[str, Tuple[Tuple[int, int], Document]]" = OrderedDict()
+_doc_cache_lock = threading.Lock()
+
+
+def _stat_key(path: str) -> Tuple[int, int]:
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+
+def _remember(path: str, key: Tuple[int, int], doc) -> None:
+    with _doc_cache_lock:
+        _doc_cache[path] = (key, doc)
+        _doc_cache.move_to_end(path)
+        while len(_doc_cache) > _DOC_CACHE_MAX:
+            _doc_cache.popitem(last=False)
+
+
+def _forget(filename: str) -> None:
+    """Drop a cached document, e.g. after an edit to it failed halfway."""
+    with _doc_cache_lock:
+        _doc_cache.pop(os.path.abspath(filename), None)
+
+
+def _peek(filename: str):
+    """Return the cached parsed document if it is still current, without loading it."""
+    path = os.path.abspath(filename)
+    key = _stat_key(path)
+    with _doc_cache_lock:
+        entry = _doc_cache.get(path)
+    return entry[1] if entry is not None and entry[0] == key else None
+
+
+def _load(filename: str):
+    """Open a document, reusing the parsed tree if the file hasn't changed since."""
+    path = os.path.abspath(filename)
+    key = _stat_key(path)
+    with _doc_cache_lock:
+        entry = _doc_cache.get(path)
+        if entry is not None and entry[0] == key:
+            _doc_cache.move_to_end(path)
+            return entry[1]
+    doc = Document(path)
+    _remember(path, key, doc)
+    return doc
+
+
+def _save(doc, filename: str) -> None:
+    """Save a document and keep its tree cached under the new file state."""
+    path = os.path.abspath(filename)
+    try:
+        doc.save(path)
+    except Exception:
+        _forget(path)
+        raise
+    _remember(path, _stat_key(path), doc)
+
+
+# One lock per document, held by whichever worker thread is working on it; an
+# entry only lives while the lock is in use, so the dict can't grow with every path
+_file_locks: "weakref.WeakValueDictionary[str, threading.Lock]" = weakref.WeakValueDictionary()
+_file_locks_lock = threading.Lock()
+
+
+def _file_lock(filename: str) -> threading.Lock:
+    path = os.path.abspath(filename)
+    with _file_locks_lock:
+        lock = _file_locks.get(path)
+        if lock is None:
+            lock = _file_locks[path] = threading.Lock()
+        return lock
+
+
+def _locked(fn, filename: str, *args):
+    """Call fn(filename, *args) while holding the document's lock."""
+    with _file_lock(ensure_docx_extension(filename)):
+        return fn(filename, *args)
+
+
+# The tools' blocking work runs on this pool so the calling event loop stays free.
+# One bounded pool for the process: the HTTP server gives every worker thread its
+# own loop, and asyncio.to_thread would start a default executor for each of them
+FORMAT_WORKERS = int(os.getenv('FORMAT_WORKERS', min(32, (os.cpu_count() or 1) + 4)))
+_executor = ThreadPoolExecutor(max_workers=FORMAT_WORKERS, thread_name_prefix='docx_format')
+
+
+async def _run_locked(fn, filename: str, *args):
+    """Run _locked(fn, filename, *args) on the shared pool and await the result."""
+    return await asyncio.get_running_loop().run_in_executor(_executor, _locked, fn, filename, *args)
+
+
+def _set_default_font_sync(filename: str, font_name: str = "Calibri", font_size: int = 11, apply_to_existing: bool = True) -> str:
     filename = ensure_docx_extension(filename)
     
     if not os.path.exists(filename):
@@ -33,7 +157,7 @@ async def set_default_font(filename: str, font_name: str = "Calibri", font_size:
         return f"Cannot modify document: {error_message}"
     
     try:
-        doc = Document(filename)
+        doc = _load(filename)
         
         # Get or create the Normal style
         try:
@@ -46,34 +170,93 @@ async def set_default_font(filename: str, font_name: str = "Calibri", font_size:
         font.name = font_name
         font.size = Pt(font_size)
         
-        # Also update all existing paragraphs that use Normal style
+        # Also update all existing paragraphs that use Normal style, finding
+        # the runs that need it in a single XPath pass over the body
         if apply_to_existing:
-            for paragraph in doc.paragraphs:
-                if paragraph.style.name == 'Normal' or paragraph.style.name.startswith('Normal'):
-                    for run in paragraph.runs:
-                        if not run.font.name or run.font.name == 'None':
-                            run.font.name = font_name
-                        if not run.font.size or run.font.size is None:
-                            run.font.size = Pt(font_size)
+            style_ids = [
+                s.style_id for s in doc.styles
+                if s.type == WD_STYLE_TYPE.PARAGRAPH and s.style_id and s.name.startswith('Normal')
+            ]
+            # Paragraphs without a pStyle use the default paragraph style, so
+            # they only count as Normal when that default is a Normal style
+            default_style = doc.styles.default(WD_STYLE_TYPE.PARAGRAPH)
+            if default_style is not None and default_style.style_id in style_ids:
+                style_ids.append('')
+            # Without any Normal style no paragraph qualifies, and the '||' an
+            # empty id list turns into would match every unstyled paragraph
+            if style_ids:
+                ids = '|' + '|'.join(style_ids) + '|'
+                size = Pt(font_size)
+                for r in _NORMAL_RUNS_XPATH(doc.element.body, ids=ids):
+                    rPr = r.get_or_add_rPr()
+                    if not rPr.rFonts_ascii:
+                        rPr.rFonts_ascii = font_name
+                        rPr.rFonts_hAnsi = font_name
+                    if rPr.sz_val is None:
+                        rPr.sz_val = size
         
         # Save the document
-        doc.save(filename)
+        _save(doc, filename)
         
         return f"Default font set to {font_name} {font_size}pt for document {filename}"
     except Exception as e:
+        _forget(filename)
         return f"Failed to set default font: {str(e)}"
 
 
-async def update_header_title_subtitle(filename: str, title: Optional[str] = None, subtitle: Optional[str] = None) -> str:
+async def set_default_font(filename: str, font_name: str = "Calibri", font_size: int = 11, apply_to_existing: bool = True) -> str:
     """
-    Update the header title and subtitle in a Word document.
-    This modifies the document header section.
+    Set the default font for the entire document.
+    This affects the Normal style and all paragraphs that use it.
     
     Args:
         filename: Path to the Word document
-        title: Header title text (optional, None to leave unchanged)
-        subtitle: Header subtitle text (optional, None to leave unchanged)
+        font_name: Font family name (default: Calibri)
+        font_size: Font size in points (default: 11)
+        apply_to_existing: If True, apply font to existing paragraphs (default: True)
+    """
+    return await _run_locked(_set_default_font_sync, filename, font_name, font_size, apply_to_existing)
+
+
+def _header_run(paragraph, bold: bool):
     """
+    Return the paragraph's only run if it is already centered Calibri 11pt
+    with the given boldness, i.e. laid out as this tool would write it.
+    """
+    runs = paragraph.runs
+    if len(runs) != 1 or paragraph.alignment != 1:
+        return None
+    run = runs[0]
+    if run.font.name != _HEADER_FONT_NAME or run.font.size != _HEADER_FONT_SIZE or bool(run.bold) != bold:
+        return None
+    return run
+
+
+def _update_header_in_place(header, title: Optional[str], subtitle: Optional[str]) -> bool:
+    """
+    Overwrite the text of a title/subtitle header written by an earlier call.
+    Returns False, changing nothing, when the header has any other layout.
+    """
+    paragraphs = header.paragraphs
+    if len(paragraphs) != 2:
+        return False
+    title_run = _header_run(paragraphs[0], True) if title is not None else None
+    subtitle_run = _header_run(paragraphs[1], False) if subtitle is not None else None
+    if (title is not None and title_run is None) or (subtitle is not None and subtitle_run is None):
+        return False
+    
+    if title_run is not None:
+        title_run.text = title
+    else:
+        paragraphs[0].clear()
+    if subtitle_run is not None:
+        subtitle_run.text = subtitle
+    else:
+        paragraphs[1].clear()
+    return True
+
+
+def _update_header_title_subtitle_sync(filename: str, title: Optional[str] = None, subtitle: Optional[str] = None) -> str:
     filename = ensure_docx_extension(filename)
     
     if not os.path.exists(filename):
@@ -88,7 +271,7 @@ async def update_header_title_subtitle(filename: str, title: Optional[str] = Non
         return "At least one of 'title' or 'subtitle' must be provided"
     
     try:
-        doc = Document(filename)
+        doc = _load(filename)
         
         # Get the header section (first section's header)
         if len(doc.sections) == 0:
@@ -96,31 +279,28 @@ async def update_header_title_subtitle(filename: str, title: Optional[str] = Non
         
         header = doc.sections[0].header
         
-        # Clear existing header paragraphs if we're updating
-        if title is not None or subtitle is not None:
+        # Repeated updates only need the text swapped in; otherwise rebuild
+        if not _update_header_in_place(header, title, subtitle):
             # Clear all existing paragraphs in header
             for paragraph in header.paragraphs:
                 paragraph.clear()
-        
-        # Add title if provided
-        if title is not None:
-            title_para = header.paragraphs[0] if len(header.paragraphs) > 0 else header.add_paragraph()
-            title_run = title_para.add_run(title)
-            title_run.font.name = "Calibri"
-            title_run.font.size = Pt(11)
-            title_run.bold = True
-            title_para.alignment = 1  # Center alignment
-        
-        # Add subtitle if provided
-        if subtitle is not None:
-            subtitle_para = header.add_paragraph()
-            subtitle_run = subtitle_para.add_run(subtitle)
-            subtitle_run.font.name = "Calibri"
-            subtitle_run.font.size = Pt(11)
-            subtitle_para.alignment = 1  # Center alignment
+            
+            # Add title if provided
+            if title is not None:
+                title_para = header.paragraphs[0] if len(header.paragraphs) > 0 else header.add_paragraph()
+                title_run = deepcopy(_HEADER_TITLE_RUN)
+                title_run.text = title
+                title_para._p.append(title_run)
+                title_para.alignment = 1  # Center alignment
+            
+            # Add subtitle if provided
+            if subtitle is not None:
+                subtitle_para = deepcopy(_HEADER_SUBTITLE_PARAGRAPH)
+                subtitle_para.r_lst[0].text = subtitle
+                header._element.append(subtitle_para)
         
         # Save the document
-        doc.save(filename)
+        _save(doc, filename)
         
         result_parts = []
         if title is not None:
@@ -130,35 +310,90 @@ async def update_header_title_subtitle(filename: str, title: Optional[str] = Non
         
         return f"Header updated with {', '.join(result_parts)} in document {filename}"
     except Exception as e:
+        _forget(filename)
         return f"Failed to update header: {str(e)}"
 
 
-async def get_header_info(filename: str) -> str:
+async def update_header_title_subtitle(filename: str, title: Optional[str] = None, subtitle: Optional[str] = None) -> str:
     """
-    Get information about the current header content.
+    Update the header title and subtitle in a Word document.
+    This modifies the document header section.
     
     Args:
         filename: Path to the Word document
+        title: Header title text (optional, None to leave unchanged)
+        subtitle: Header subtitle text (optional, None to leave unchanged)
     """
+    return await _run_locked(_update_header_title_subtitle_sync, filename, title, subtitle)
+
+
+def _header_paragraph_texts(header_element) -> list:
+    """Stripped text of each top-level paragraph in a header."""
+    return [
+        "".join([r.text for r in _PARAGRAPH_RUNS_XPATH(p)]).strip()
+        for p in _PARAGRAPHS_XPATH(header_element)
+    ]
+
+
+def _read_first_header(filename: str) -> Optional[list]:
+    """
+    Read the paragraph texts of the first section's header straight from the
+    package, streaming document.xml only as far as the first section break
+    instead of loading the whole document.
+    Returns None when the section has no header of its own.
+    """
+    with zipfile.ZipFile(filename) as z:
+        rels = etree.fromstring(z.read("_rels/.rels"))
+        doc_part = next(r.get("Target") for r in rels if r.get("Type") == _OFFICE_DOCUMENT_REL).lstrip("/")
+        
+        rel_id = None
+        with z.open(doc_part) as f:
+            for _, elem in etree.iterparse(f, tag=qn('w:sectPr')):
+                if elem.getparent().tag not in _SECTPR_PARENTS:
+                    continue  # A tracked change's previous section properties
+                for ref in elem.iterchildren(qn('w:headerReference')):
+                    if ref.get(qn('w:type')) == "default":
+                        rel_id = ref.get(qn('r:id'))
+                break
+        if rel_id is None:
+            return None
+        
+        doc_dir, doc_name = posixpath.split(doc_part)
+        doc_rels = etree.fromstring(z.read(posixpath.join(doc_dir, "_rels", doc_name + ".rels")))
+        target = next(r.get("Target") for r in doc_rels if r.get("Id") == rel_id)
+        header_part = target.lstrip("/") if target.startswith("/") else posixpath.normpath(posixpath.join(doc_dir, target))
+        return _header_paragraph_texts(parse_xml(z.read(header_part)))
+
+
+def _get_header_info_sync(filename: str) -> str:
     filename = ensure_docx_extension(filename)
     
     if not os.path.exists(filename):
         return f"Document {filename} does not exist"
     
     try:
-        doc = Document(filename)
+        # An already parsed document is cheapest; otherwise read just the header
+        texts = None
+        doc = _peek(filename)
+        if doc is None:
+            try:
+                texts = _read_first_header(filename)
+            except Exception:
+                texts = None  # Unusual package layout; let python-docx handle it
         
-        if len(doc.sections) == 0:
-            return "Document has no sections"
+        if texts is None:
+            doc = doc or _load(filename)
+            
+            if len(doc.sections) == 0:
+                return "Document has no sections"
+            
+            texts = _header_paragraph_texts(doc.sections[0].header._element)
         
-        header = doc.sections[0].header
-        
-        if len(header.paragraphs) == 0:
+        if not texts:
             return "Header is empty"
         
         info_parts = []
-        for i, para in enumerate(header.paragraphs):
-            text = para.text.strip()
+        for i, text in enumerate(texts):
             if text:
                 info_parts.append(f"Line {i+1}: {text}")
         
@@ -169,3 +404,13 @@ async def get_header_info(filename: str) -> str:
     except Exception as e:
         return f"Failed to get header info: {str(e)}"
 
+
+async def get_header_info(filename: str) -> str:
+    """
+    Get information about the current header content.
+    
+    Args:
+        filename: Path to the Word document
+    """
+    return await _run_locked(_get_header_info_sync, filename)
+
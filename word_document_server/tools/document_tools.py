@@ -1,18 +1,70 @@
 """
 Document creation and manipulation tools for Word Document Server.
 """
+import io
 import os
 import json
-import shutil
+import logging
+import functools
+import traceback
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Optional, Any
 from docx import Document
+from docx.enum.style import WD_STYLE_TYPE
+from docx.oxml import OxmlElement
+from docx.text.paragraph import Paragraph
 
 from word_document_server.utils.file_utils import check_file_writeable, ensure_docx_extension, create_document_copy
+from word_document_server.utils.header_utils import apply_header_placeholders
 from word_document_server.utils.document_utils import get_document_properties, extract_document_text, get_document_structure, get_document_xml, insert_header_near_text, insert_line_or_paragraph_near_text
 from word_document_server.core.styles import ensure_heading_style, ensure_table_style
-from word_document_server.tools.template_tools import get_template_path, template_exists
+from word_document_server.tools.template_tools import load_template_document, template_exists
 from docx.shared import Pt
 
+logger = logging.getLogger(__name__)
+
+# Full tracebacks for recovered errors are only printed with MCP_DEBUG=1 (see README)
+_DEBUG = os.getenv('MCP_DEBUG') == '1'
+
+# Upper bound on threads used to open merge sources concurrently
+MERGE_LOAD_WORKERS = 8
+
+# Default body font for new documents
+_DEFAULT_FONT_NAME = 'Calibri'
+_DEFAULT_FONT_SIZE = Pt(11)
+
+
+def _file_signature(path: str) -> Optional[tuple]:
+    """Identify a file's current contents by stat, or None if it can't be stat'ed."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    # ctime as well as mtime: copies keep the source's mtime
+    return (st.st_mtime_ns, st.st_ctime_ns, st.st_size, st.st_ino)
+
+
+def _load_merge_source(path: str) -> Document:
+    """Open a merge source from one bulk read, so the zip reader seeks in memory rather than on disk."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    return Document(io.BytesIO(data))
+
+
+@functools.lru_cache(maxsize=128)
+def _info_cached(filename: str, signature: tuple) -> str:
+    return json.dumps(get_document_properties(filename), indent=2)
+
+
+@functools.lru_cache(maxsize=128)
+def _outline_cached(filename: str, signature: tuple) -> str:
+    return json.dumps(get_document_structure(filename), indent=2)
+
+
+@functools.lru_cache(maxsize=32)
+def _text_cached(filename: str, signature: tuple) -> str:
+    return extract_document_text(filename)
+
 
 async def create_document(filename: str, title: Optional[str] = None, author: Optional[str] = None, 
                          use_template: bool = True, document_title: Optional[str] = None, 
@@ -36,11 +88,10 @@ async def create_document(filename: str, title: Optional[str] = None, author: Op
     
     try:
         # Use template if available and use_template is True
-        if use_template and template_exists():
-            template_path = get_template_path()
-            # Copy template to new document
-            shutil.copy2(template_path, filename)
-            doc = Document(filename)
+        using_template = use_template and template_exists()
+        if using_template:
+            # Start from a copy of the parsed template; saving below writes the file
+            doc = load_template_document()
         else:
             # Create new document from scratch
             doc = Document()
@@ -58,137 +109,27 @@ async def create_document(filename: str, title: Optional[str] = None, author: Op
         # Set default font to Calibri 11
         try:
             normal_style = doc.styles['Normal']
-            normal_style.font.name = 'Calibri'
-            normal_style.font.size = Pt(11)
+            normal_style.font.name = _DEFAULT_FONT_NAME
+            normal_style.font.size = _DEFAULT_FONT_SIZE
         except Exception:
             pass  # If style doesn't exist, continue without error
         
         # Replace header placeholders if provided
         if document_title is not None or document_subtitle is not None:
             try:
-                if len(doc.sections) > 0:
-                    section = doc.sections[0]
-                    # Check all possible header types: primary header, first page header, even page header
-                    headers_to_check = []
-                    
-                    # Primary header (default) - always check this
-                    try:
-                        if section.header:
-                            headers_to_check.append(('primary', section.header))
-                    except:
-                        pass
-                    
-                    # First page header (if different first page is enabled)
-                    try:
-                        if hasattr(section, 'different_first_page_header_footer') and section.different_first_page_header_footer:
-                            if hasattr(section, 'first_page_header') and section.first_page_header:
-                                headers_to_check.append(('first_page', section.first_page_header))
-                    except:
-                        pass
-                    
-                    # Even page header (if different odd/even is enabled)
-                    try:
-                        if hasattr(section, 'different_odd_and_even_pages_header_footer') and section.different_odd_and_even_pages_header_footer:
-                            if hasattr(section, 'even_page_header') and section.even_page_header:
-                                headers_to_check.append(('even_page', section.even_page_header))
-                    except:
-                        pass
-                    
-                    # Also check odd page header if it exists
-                    try:
-                        if hasattr(section, 'different_odd_and_even_pages_header_footer') and section.different_odd_and_even_pages_header_footer:
-                            if hasattr(section, 'header') and section.header:
-                                headers_to_check.append(('odd_page', section.header))
-                    except:
-                        pass
-                    
-                    # Process all headers
-                    for header_name, header in headers_to_check:
-                        for paragraph in header.paragraphs:
-                            # Replace {Document Title} placeholder
-                            if document_title is not None and '{Document Title}' in paragraph.text:
-                                # Clear and rebuild the paragraph
-                                original_runs = []
-                                for run in paragraph.runs:
-                                    original_runs.append({
-                                        'text': run.text,
-                                        'bold': run.bold,
-                                        'italic': run.italic,
-                                        'font_name': run.font.name,
-                                        'font_size': run.font.size
-                                    })
-                                
-                                # Replace text
-                                new_text = paragraph.text.replace('{Document Title}', document_title)
-                                paragraph.clear()
-                                
-                                # Recreate runs with formatting
-                                if original_runs:
-                                    first_run = original_runs[0]
-                                    run = paragraph.add_run(new_text)
-                                    run.bold = first_run.get('bold', False)
-                                    run.italic = first_run.get('italic', False)
-                                    if first_run.get('font_name'):
-                                        run.font.name = first_run['font_name']
-                                    if first_run.get('font_size'):
-                                        run.font.size = first_run['font_size']
-                                    else:
-                                        run.font.name = 'Calibri'
-                                        run.font.size = Pt(11)
-                                        run.bold = True
-                                else:
-                                    run = paragraph.add_run(new_text)
-                                    run.font.name = 'Calibri'
-                                    run.font.size = Pt(11)
-                                    run.bold = True
-                            
-                            # Replace {Document Subtitle} placeholder
-                            if document_subtitle is not None and '{Document Subtitle}' in paragraph.text:
-                                # Clear and rebuild the paragraph
-                                original_runs = []
-                                for run in paragraph.runs:
-                                    original_runs.append({
-                                        'text': run.text,
-                                        'bold': run.bold,
-                                        'italic': run.italic,
-                                        'font_name': run.font.name,
-                                        'font_size': run.font.size
-                                    })
-                                
-                                # Replace text
-                                new_text = paragraph.text.replace('{Document Subtitle}', document_subtitle)
-                                paragraph.clear()
-                                
-                                # Recreate runs with formatting
-                                if original_runs:
-                                    first_run = original_runs[0]
-                                    run = paragraph.add_run(new_text)
-                                    run.bold = first_run.get('bold', False)
-                                    run.italic = first_run.get('italic', False)
-                                    if first_run.get('font_name'):
-                                        run.font.name = first_run['font_name']
-                                    if first_run.get('font_size'):
-                                        run.font.size = first_run['font_size']
-                                    else:
-                                        run.font.name = 'Calibri'
-                                        run.font.size = Pt(11)
-                                else:
-                                    run = paragraph.add_run(new_text)
-                                    run.font.name = 'Calibri'
-                                    run.font.size = Pt(11)
+                apply_header_placeholders(doc, document_title, document_subtitle, doc.sections[:1])
             except Exception as e:
-                # If header replacement fails, log and continue
-                import traceback
-                error_msg = f"Header replacement error: {str(e)}"
-                print(error_msg)
-                traceback.print_exc()
+                # If header replacement fails, log and continue; stdout may be
+                # the stdio transport's JSON-RPC stream, so nothing goes there
+                logger.warning("Header replacement failed for %s: %s", filename, e)
+                if _DEBUG:
+                    traceback.print_exc()
                 # Don't fail the document creation, just continue
-                pass
         
         # Save the document
         doc.save(filename)
         
-        template_note = " (using template)" if (use_template and template_exists()) else ""
+        template_note = " (using template)" if using_template else ""
         header_note = ""
         if document_title is not None or document_subtitle is not None:
             parts = []
@@ -211,12 +152,13 @@ async def get_document_info(filename: str) -> str:
     """
     filename = ensure_docx_extension(filename)
     
-    if not os.path.exists(filename):
+    # The stat doubles as the existence check and the cache key
+    signature = _file_signature(filename)
+    if signature is None:
         return f"Document {filename} does not exist"
     
     try:
-        properties = get_document_properties(filename)
-        return json.dumps(properties, indent=2)
+        return _info_cached(filename, signature)
     except Exception as e:
         return f"Failed to get document info: {str(e)}"
 
@@ -229,7 +171,10 @@ async def get_document_text(filename: str) -> str:
     """
     filename = ensure_docx_extension(filename)
     
-    return extract_document_text(filename)
+    signature = _file_signature(filename)
+    if signature is None:
+        return extract_document_text(filename)
+    return _text_cached(filename, signature)
 
 
 async def get_document_outline(filename: str) -> str:
@@ -240,8 +185,11 @@ async def get_document_outline(filename: str) -> str:
     """
     filename = ensure_docx_extension(filename)
     
-    structure = get_document_structure(filename)
-    return json.dumps(structure, indent=2)
+    # Unchanged documents skip both the parse and the JSON encoding
+    signature = _file_signature(filename)
+    if signature is None:
+        return json.dumps(get_document_structure(filename), indent=2)
+    return _outline_cached(filename, signature)
 
 
 async def list_available_documents(directory: Optional[str] = None) -> str:
@@ -257,27 +205,26 @@ async def list_available_documents(directory: Optional[str] = None) -> str:
         else:
             storage_dir = directory
         
-        if not os.path.exists(storage_dir):
-            return f"Storage directory {storage_dir} does not exist"
-        
         # List only .docx files (templates and created documents)
-        all_files = os.listdir(storage_dir)
-        docx_files = [f for f in all_files if f.endswith('.docx')]
+        try:
+            with os.scandir(storage_dir) as it:
+                docx_files = [entry for entry in it if entry.name.endswith('.docx') and entry.is_file()]
+        except FileNotFoundError:
+            return f"Storage directory {storage_dir} does not exist"
         
         if not docx_files:
             return f"No Word documents found in {storage_dir}"
         
-        docx_files.sort()
-        result = f"Found {len(docx_files)} Word document(s) in {storage_dir}:\n"
-        for file in docx_files:
-            file_path = os.path.join(storage_dir, file)
+        docx_files.sort(key=lambda entry: entry.name)
+        lines = [f"Found {len(docx_files)} Word document(s) in {storage_dir}:\n"]
+        for entry in docx_files:
             try:
-                size = os.path.getsize(file_path) / 1024  # KB
-                result += f"- {file} ({size:.2f} KB)\n"
-            except:
-                result += f"- {file}\n"
+                size = entry.stat().st_size / 1024  # KB
+                lines.append(f"- {entry.name} ({size:.2f} KB)\n")
+            except OSError:
+                lines.append(f"- {entry.name}\n")
         
-        return result
+        return "".join(lines)
     except Exception as e:
         return f"Failed to list documents: {str(e)}"
 
@@ -303,104 +250,10 @@ async def copy_document(source_filename: str, destination_filename: Optional[str
         if (document_title is not None or document_subtitle is not None) and new_path:
             try:
                 doc = Document(new_path)
-                # Check all sections (in case document has multiple sections)
-                for section_idx, section in enumerate(doc.sections):
-                    # Check all possible header types: primary header, first page header, even page header
-                    headers_to_check = []
-                    
-                    # Primary header (default) - always check this
-                    try:
-                        if section.header:
-                            headers_to_check.append(('primary', section.header))
-                    except:
-                        pass
-                    
-                    # First page header (if different first page is enabled)
-                    try:
-                        if hasattr(section, 'different_first_page_header_footer') and section.different_first_page_header_footer:
-                            if hasattr(section, 'first_page_header') and section.first_page_header:
-                                headers_to_check.append(('first_page', section.first_page_header))
-                    except:
-                        pass
-                    
-                    # Even page header (if different odd/even is enabled)
-                    try:
-                        if hasattr(section, 'different_odd_and_even_pages_header_footer') and section.different_odd_and_even_pages_header_footer:
-                            if hasattr(section, 'even_page_header') and section.even_page_header:
-                                headers_to_check.append(('even_page', section.even_page_header))
-                    except:
-                        pass
-                    
-                    # Process all headers
-                    for header_name, header in headers_to_check:
-                        for paragraph in header.paragraphs:
-                            # Replace {Document Title} placeholder
-                            if document_title is not None and '{Document Title}' in paragraph.text:
-                                original_runs = []
-                                for run in paragraph.runs:
-                                    original_runs.append({
-                                        'text': run.text,
-                                        'bold': run.bold,
-                                        'italic': run.italic,
-                                        'font_name': run.font.name,
-                                        'font_size': run.font.size
-                                    })
-                                
-                                new_text = paragraph.text.replace('{Document Title}', document_title)
-                                paragraph.clear()
-                                
-                                if original_runs:
-                                    first_run = original_runs[0]
-                                    run = paragraph.add_run(new_text)
-                                    run.bold = first_run.get('bold', False)
-                                    run.italic = first_run.get('italic', False)
-                                    if first_run.get('font_name'):
-                                        run.font.name = first_run['font_name']
-                                    if first_run.get('font_size'):
-                                        run.font.size = first_run['font_size']
-                                    else:
-                                        run.font.name = 'Calibri'
-                                        run.font.size = Pt(11)
-                                        run.bold = True
-                                else:
-                                    run = paragraph.add_run(new_text)
-                                    run.font.name = 'Calibri'
-                                    run.font.size = Pt(11)
-                                    run.bold = True
-                            
-                            # Replace {Document Subtitle} placeholder
-                            if document_subtitle is not None and '{Document Subtitle}' in paragraph.text:
-                                original_runs = []
-                                for run in paragraph.runs:
-                                    original_runs.append({
-                                        'text': run.text,
-                                        'bold': run.bold,
-                                        'italic': run.italic,
-                                        'font_name': run.font.name,
-                                        'font_size': run.font.size
-                                    })
-                                
-                                new_text = paragraph.text.replace('{Document Subtitle}', document_subtitle)
-                                paragraph.clear()
-                                
-                                if original_runs:
-                                    first_run = original_runs[0]
-                                    run = paragraph.add_run(new_text)
-                                    run.bold = first_run.get('bold', False)
-                                    run.italic = first_run.get('italic', False)
-                                    if first_run.get('font_name'):
-                                        run.font.name = first_run['font_name']
-                                    if first_run.get('font_size'):
-                                        run.font.size = first_run['font_size']
-                                    else:
-                                        run.font.name = 'Calibri'
-                                        run.font.size = Pt(11)
-                                else:
-                                    run = paragraph.add_run(new_text)
-                                    run.font.name = 'Calibri'
-                                    run.font.size = Pt(11)
-                
-                doc.save(new_path)
+                # Check all sections (in case document has multiple sections);
+                # without any placeholder the plain copy already is the result
+                if apply_header_placeholders(doc, document_title, document_subtitle):
+                    doc.save(new_path)
                 
                 if document_title is not None or document_subtitle is not None:
                     parts = []
@@ -410,7 +263,8 @@ async def copy_document(source_filename: str, destination_filename: Optional[str
                         parts.append(f"subtitle: '{document_subtitle}'")
                     message += f" (header updated: {', '.join(parts)})"
             except Exception:
-                pass  # If header replacement fails, continue anyway
+                # If header replacement fails, continue anyway
+                logger.debug("Header replacement failed for %s", new_path, exc_info=True)
         
         return message
     else:
@@ -434,12 +288,9 @@ async def merge_documents(target_filename: str, source_filenames: List[str], add
     if not is_writeable:
         return f"Cannot create target document: {error_message}"
     
-    # Validate all source documents exist
-    missing_files = []
-    for filename in source_filenames:
-        doc_filename = ensure_docx_extension(filename)
-        if not os.path.exists(doc_filename):
-            missing_files.append(doc_filename)
+    # Validate all source documents exist, normalizing the names once for the merge below
+    doc_filenames = [ensure_docx_extension(filename) for filename in source_filenames]
+    missing_files = [doc_filename for doc_filename in doc_filenames if not os.path.isfile(doc_filename)]
     
     if missing_files:
         return f"Cannot merge documents. The following source files do not exist: {', '.join(missing_files)}"
@@ -447,33 +298,53 @@ async def merge_documents(target_filename: str, source_filenames: List[str], add
     try:
         # Create a new document for the merged result
         target_doc = Document()
+        target_body = target_doc.element.body
+        # Look paragraph styles up by name once instead of walking styles.xml per paragraph
+        styles_by_name = {style.name: style for style in target_doc.styles if style.type == WD_STYLE_TYPE.PARAGRAPH}
+        normal_style = styles_by_name['Normal']
+        
+        # Unzipping and parsing dominate, and lxml releases the GIL while parsing,
+        # so open the sources concurrently and merge them in order below
+        if len(doc_filenames) > 1:
+            with ThreadPoolExecutor(max_workers=min(MERGE_LOAD_WORKERS, len(doc_filenames))) as executor:
+                source_docs = list(executor.map(_load_merge_source, doc_filenames))
+        else:
+            source_docs = [_load_merge_source(doc_filename) for doc_filename in doc_filenames]
         
         # Process each source document
-        for i, filename in enumerate(source_filenames):
-            doc_filename = ensure_docx_extension(filename)
-            source_doc = Document(doc_filename)
+        for i, source_doc in enumerate(source_docs):
             
             # Add page break between documents (except before the first one)
             if add_page_breaks and i > 0:
                 target_doc.add_page_break()
             
-            # Copy all paragraphs
-            for paragraph in source_doc.paragraphs:
+            paragraphs = source_doc.paragraphs
+            texts = [paragraph.text for paragraph in paragraphs]
+            tables = source_doc.tables
+            # Trailing empty paragraphs right before the next page break would only
+            # add blank lines (or a blank page) to the end of this document's part
+            end = len(paragraphs)
+            if add_page_breaks and i < len(source_docs) - 1 and not tables:
+                while end and not texts[end - 1]:
+                    end -= 1
+            
+            # Build the copied paragraphs detached and append them in one go below
+            new_paragraphs = []
+            for paragraph, text in zip(paragraphs[:end], texts):
                 # Create a new paragraph with the same text and style
-                new_paragraph = target_doc.add_paragraph(paragraph.text)
-                new_paragraph.style = target_doc.styles['Normal']  # Default style
-                
-                # Try to match the style if possible
-                try:
-                    if paragraph.style and paragraph.style.name in target_doc.styles:
-                        new_paragraph.style = target_doc.styles[paragraph.style.name]
-                except:
-                    pass
+                new_paragraph = Paragraph(OxmlElement('w:p'), target_doc._body)
+                new_paragraphs.append(new_paragraph._p)
+                # Match the style if the target has it, otherwise fall back to Normal
+                source_style = paragraph.style
+                new_paragraph.style = styles_by_name.get(source_style.name if source_style else None, normal_style)
+                if not text:
+                    continue  # No run to carry formatting
                 
+                new_paragraph.add_run(text)
                 # Copy run formatting
-                for i, run in enumerate(paragraph.runs):
-                    if i < len(new_paragraph.runs):
-                        new_run = new_paragraph.runs[i]
+                for run_index, run in enumerate(paragraph.runs):
+                    if run_index < len(new_paragraph.runs):
+                        new_run = new_paragraph.runs[run_index]
                         # Copy basic formatting
                         new_run.bold = run.bold
                         new_run.italic = run.italic
@@ -482,8 +353,15 @@ async def merge_documents(target_filename: str, source_filenames: List[str], add
                         if run.font.size:
                             new_run.font.size = run.font.size
             
+            # Not deepcopies of the source <w:p>: those would carry image, hyperlink
+            # and numbering references that don't resolve in the target package
+            sect_pr = target_body.sectPr
+            target_body.extend(new_paragraphs)
+            if sect_pr is not None:
+                target_body.append(sect_pr)  # sectPr must stay the body's last child
+            
             # Copy all tables
-            for table in source_doc.tables:
+            for table in tables:
                 copy_table(table, target_doc)
         
         # Save the merged document
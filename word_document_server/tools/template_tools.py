@@ -3,25 +3,73 @@ Template management tools for Word Document Server.
 """
 
 import os
-import shutil
-from typing import Optional
+import copy
+import time
+import threading
+from typing import Optional, Tuple
 from docx import Document
-from word_document_server.utils.file_utils import ensure_docx_extension
+from word_document_server.utils.file_utils import ensure_docx_extension, fast_copy
 
 
 TEMPLATE_FILENAME = '.template.docx'
 # Use the same storage directory as documents
 TEMPLATE_DIR = os.getenv('DISK_PATH', os.getenv('DOCUMENTS_DIR', '/mnt/disk/documents'))
+_TEMPLATE_PATH = os.path.join(TEMPLATE_DIR, TEMPLATE_FILENAME)
+
+# Seconds a template existence check is trusted; the tools here update it
+# directly, so this only bounds changes made to the file from elsewhere
+TEMPLATE_EXISTS_TTL = 5.0
+_template_state: Optional[Tuple[bool, float]] = None
 
 
 def get_template_path() -> str:
     """Get the path to the template file."""
-    return os.path.join(TEMPLATE_DIR, TEMPLATE_FILENAME)
+    return _TEMPLATE_PATH
 
 
 def template_exists() -> bool:
     """Check if a template exists."""
-    return os.path.exists(get_template_path())
+    global _template_state
+    state = _template_state
+    now = time.monotonic()
+    if state is not None and now - state[1] < TEMPLATE_EXISTS_TTL:
+        return state[0]
+    exists = os.path.exists(_TEMPLATE_PATH)
+    _template_state = (exists, now)
+    return exists
+
+
+# Parsed template keyed by (ctime_ns, size); new documents are deep copies of it.
+# ctime rather than mtime, as setting the template carries over the source's mtime
+_template_doc: Optional[Tuple[Tuple[int, int], Document]] = None
+_template_doc_lock = threading.Lock()
+
+
+def load_template_document() -> Document:
+    """
+    Get a new document built from the template.
+    The template is parsed once and reused until the file changes; each
+    caller gets its own copy to modify.
+    """
+    global _template_doc
+    st = os.stat(_TEMPLATE_PATH)
+    key = (st.st_ctime_ns, st.st_size)
+    with _template_doc_lock:
+        cached = _template_doc
+        if cached is None or cached[0] != key:
+            cached = _template_doc = (key, Document(_TEMPLATE_PATH))
+    return copy.deepcopy(cached[1])
+
+
+def invalidate_template_cache() -> None:
+    """Forget the cached existence check, e.g. after writing the template file directly."""
+    global _template_state
+    _template_state = None
+
+
+def _remember_template(exists: bool) -> None:
+    global _template_state
+    _template_state = (exists, time.monotonic())
 
 
 async def set_template_from_file(template_filename: str) -> str:
@@ -42,7 +90,8 @@ async def set_template_from_file(template_filename: str) -> str:
         os.makedirs(os.path.dirname(template_path), exist_ok=True)
         
         # Copy the file to template location
-        shutil.copy2(template_filename, template_path)
+        fast_copy(template_filename, template_path)
+        _remember_template(True)
         
         return f"Template set successfully from {template_filename}"
     except Exception as e:
@@ -51,15 +100,19 @@ async def set_template_from_file(template_filename: str) -> str:
 
 async def get_template_info() -> str:
     """Get information about the current template."""
-    if not template_exists():
-        return "No template is set. Use set_template_from_file to upload a template."
-    
+    template_path = get_template_path()
     try:
-        template_path = get_template_path()
-        size = os.path.getsize(template_path) / 1024  # KB
-        return f"Template exists: {template_path} ({size:.2f} KB)"
+        # One stat answers both whether the template exists and its size
+        st = os.stat(template_path)
+    except FileNotFoundError:
+        _remember_template(False)
+        return "No template is set. Use set_template_from_file to upload a template."
     except Exception as e:
         return f"Error getting template info: {str(e)}"
+    
+    _remember_template(True)
+    size = st.st_size / 1024  # KB
+    return f"Template exists: {template_path} ({size:.2f} KB)"
 
 
 async def clear_template() -> str:
@@ -71,6 +124,7 @@ async def clear_template() -> str:
     
     try:
         os.remove(template_path)
+        _remember_template(False)
         return "Template cleared successfully"
     except Exception as e:
         return f"Failed to clear template: {str(e)}"
@@ -2,8 +2,21 @@
 File utility functions for Word Document Server.
 """
 import os
-from typing import Tuple, Optional
+import errno
 import shutil
+from typing import Tuple, Optional
+
+# Block size for the plain read/write part of fast_copy
+_COPY_CHUNK = 1 << 20
+_OPEN_FLAGS = getattr(os, 'O_CLOEXEC', 0) | getattr(os, 'O_BINARY', 0)
+# In-kernel copy paths still worth trying. Each is switched off for the rest of
+# the process the first time the platform rejects it outright, rather than
+# failing once per copy; errors that depend on the files (e.g. EXDEV) don't count.
+_copy_paths = {
+    'copy_file_range': hasattr(os, 'copy_file_range'),
+    'sendfile': hasattr(os, 'sendfile'),
+}
+_UNSUPPORTED = frozenset({errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.EPERM})
 
 
 def check_file_writeable(filepath: str) -> Tuple[bool, str]:
@@ -43,6 +56,75 @@ def check_file_writeable(filepath: str) -> Tuple[bool, str]:
         return False, f"Unknown error checking file permissions: {str(e)}"
 
 
+def fast_copy(source_path: str, dest_path: str) -> None:
+    """
+    Copy a file's contents and modification time, in the kernel where possible.
+    
+    Tries copy_file_range (which can reflink on copy-on-write filesystems),
+    then sendfile, then a plain read/write loop for whatever they left. Only
+    the timestamps are carried over (no mode bits or xattrs).
+    
+    Args:
+        source_path: Path to the file to copy
+        dest_path: Path to write the copy to
+    
+    Raises:
+        shutil.SameFileError: If both paths are the same file
+    """
+    sfd = os.open(source_path, os.O_RDONLY | _OPEN_FLAGS)
+    try:
+        st = os.fstat(sfd)
+        try:
+            if os.path.samestat(st, os.stat(dest_path)):
+                raise shutil.SameFileError(f"{source_path!r} and {dest_path!r} are the same file")
+        except FileNotFoundError:
+            pass
+        dfd = os.open(dest_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | _OPEN_FLAGS, 0o666)
+        try:
+            _copy_fd(sfd, dfd, st.st_size)
+        finally:
+            os.close(dfd)
+    finally:
+        os.close(sfd)
+    os.utime(dest_path, ns=(st.st_atime_ns, st.st_mtime_ns))
+
+
+def _copy_fd(sfd: int, dfd: int, remaining: int) -> None:
+    """Copy from sfd's offset to dfd's until EOF, preferring in-kernel copies for the first remaining bytes."""
+    # copy_file_range can reflink on CoW filesystems and clone server-side on NFS
+    if remaining > 0 and _copy_paths['copy_file_range']:
+        remaining = _kernel_copy('copy_file_range', lambda n: os.copy_file_range(sfd, dfd, n), remaining)
+    # Older kernels and non-Linux systems only sendfile to sockets
+    if remaining > 0 and _copy_paths['sendfile']:
+        remaining = _kernel_copy('sendfile', lambda n: os.sendfile(dfd, sfd, None, n), remaining)
+    
+    # Whatever the kernel paths left; also catches files whose size stat doesn't report
+    while True:
+        chunk = os.read(sfd, _COPY_CHUNK)
+        if not chunk:
+            return
+        view = memoryview(chunk)
+        while view:
+            view = view[os.write(dfd, view):]
+
+
+def _kernel_copy(path: str, copy, remaining: int) -> int:
+    """
+    Run one in-kernel copy path until remaining bytes are done or it stops
+    making progress; return the bytes still left, from the offsets reached.
+    """
+    try:
+        while remaining > 0:
+            sent = copy(remaining)
+            if sent == 0:
+                break  # Gave up early (seen on some FUSE and procfs-like files)
+            remaining -= sent
+    except OSError as e:
+        if e.errno in _UNSUPPORTED:
+            _copy_paths[path] = False
+    return remaining
+
+
 def create_document_copy(source_path: str, dest_path: Optional[str] = None) -> Tuple[bool, str, Optional[str]]:
     """
     Create a copy of a document.
@@ -64,7 +146,7 @@ def create_document_copy(source_path: str, dest_path: Optional[str] = None) -> T
     
     try:
         # Simple file copy
-        shutil.copy2(source_path, dest_path)
+        fast_copy(source_path, dest_path)
         return True, f"Document copied to {dest_path}", dest_path
     except Exception as e:
         return False, f"Failed to copy document: {str(e)}", None
@@ -0,0 +1,134 @@
+"""
+Header utility functions for Word Document Server.
+"""
+import re
+from typing import Optional
+from docx.shared import Pt
+from docx.oxml.ns import nsmap, qn
+from docx.text.paragraph import Paragraph
+from lxml import etree
+
+
+TITLE_PLACEHOLDER = '{Document Title}'
+SUBTITLE_PLACEHOLDER = '{Document Subtitle}'
+_HAS_PLACEHOLDER = re.compile(r'\{Document (?:Title|Subtitle)\}')
+# Top-level header paragraphs with a '{' in any of their text nodes; every
+# paragraph that can hold a placeholder, without wrapping the rest in Python objects
+_CANDIDATE_PARAGRAPHS = etree.XPath("./w:p[.//w:t[contains(., '{')]]", namespaces={'w': nsmap['w']})
+_XML_SPACE = qn('xml:space')
+
+# Formatting for placeholder text whose first run has no size of its own
+_DEFAULT_FONT_NAME = 'Calibri'
+_DEFAULT_FONT_SIZE = Pt(11)
+
+
+def section_headers(section) -> list:
+    """Headers of a section to search for placeholders: the primary one, plus the first page one when enabled."""
+    headers = [section.header]
+    if section.different_first_page_header_footer:
+        headers.append(section.first_page_header)
+    return headers
+
+
+def apply_header_placeholders(doc, document_title: Optional[str], document_subtitle: Optional[str], sections=None) -> bool:
+    """
+    Replace {Document Title} / {Document Subtitle} placeholders in a document's headers.
+    
+    Placeholders are replaced inside the runs holding them, so each run keeps
+    its formatting. A paragraph where a placeholder spans several runs is
+    rebuilt as a single run carrying the formatting of its first run (Calibri
+    11pt when that has no size; bold too for titles).
+    
+    Args:
+        doc: Document to update
+        document_title: Text for {Document Title}, or None to leave it
+        document_subtitle: Text for {Document Subtitle}, or None to leave it
+        sections: Sections whose headers are searched (default: all)
+    
+    Returns:
+        True if any placeholder was replaced
+    """
+    if sections is None:
+        sections = doc.sections
+    changed = False
+    for section in sections:
+        for header in section_headers(section):
+            for p in _CANDIDATE_PARAGRAPHS(header._element):
+                if _replace_in_paragraph(Paragraph(p, header), document_title, document_subtitle):
+                    changed = True
+    return changed
+
+
+def _replace_in_paragraph(paragraph, document_title: Optional[str], document_subtitle: Optional[str]) -> bool:
+    text = paragraph.text
+    if not _HAS_PLACEHOLDER.search(text):
+        return False
+    
+    # Swap placeholders inside the runs that hold them, keeping every run's
+    # formatting. A placeholder split across runs (or inside a hyperlink)
+    # can't be swapped that way, so the paragraph is rebuilt instead.
+    # Both placeholders are worked out on plain strings first; the runs are
+    # then written once, or the paragraph rebuilt once, after the single walk
+    runs = paragraph.runs
+    original_texts = [run.text for run in runs]
+    run_texts = list(original_texts)
+    in_place = True
+    title_hit = subtitle_hit = False
+    for token, value in ((TITLE_PLACEHOLDER, document_title), (SUBTITLE_PLACEHOLDER, document_subtitle)):
+        if value is None:
+            continue
+        count = text.count(token)
+        if not count:
+            continue
+        if token is TITLE_PLACEHOLDER:
+            title_hit = True
+        else:
+            subtitle_hit = True
+        if in_place and sum(t.count(token) for t in run_texts) == count:
+            for i, t in enumerate(run_texts):
+                if token in t:
+                    run_texts[i] = t.replace(token, value)
+        else:
+            in_place = False
+        text = text.replace(token, value)
+    if not (title_hit or subtitle_hit):
+        return False
+    if in_place:
+        for run, old, new in zip(runs, original_texts, run_texts):
+            if new != old:
+                _set_run_text(run, new)
+        return True
+    
+    first = runs[0] if runs else None
+    if first is not None:
+        bold, italic = first.bold, first.italic
+        font_name, font_size = first.font.name, first.font.size
+    paragraph.clear()
+    run = paragraph.add_run(text)
+    
+    if first is not None:
+        run.bold = bold
+        run.italic = italic
+        if font_name:
+            run.font.name = font_name
+        if font_size:
+            run.font.size = font_size
+            return True
+    run.font.name = _DEFAULT_FONT_NAME
+    run.font.size = _DEFAULT_FONT_SIZE
+    if title_hit:
+        run.bold = True
+    return True
+
+
+def _set_run_text(run, text: str) -> None:
+    """Set a run's text, editing its w:t node directly when that is all the run holds."""
+    content = [child for child in run._r if child.tag != qn('w:rPr')]
+    if len(content) != 1 or content[0].tag != qn('w:t') or '\t' in text or '\n' in text:
+        # Tabs and breaks need their own elements; let python-docx lay those out
+        run.text = text
+        return
+    t = content[0]
+    t.text = text
+    if text != text.strip():
+        t.set(_XML_SPACE, 'preserve')